@@ -0,0 +1,279 @@
+# Solitaire: Seahaven - NumPy batch engine
+#
+# Keeps N games in NumPy arrays and moves all of them at once:
+#     tableau     (N, 10, HEIGHT) card codes, bottom card first
+#     heights     (N, 10)         number of cards in every column
+#     cells       (N, 4)          card codes, 0 for an empty cell
+#     foundation  (N, 4)          top card code of every pile, 0 when empty
+#     home        (N,)            cards on the foundation
+# Card codes are the ones of state.py.  Moves are numbered as in
+# record.MOVE_CODES, so legal() gives an (N, 226) mask that a policy can
+# pick from, and apply() plays one chosen move in every game.
+#     python batch.py --games 4096 --moves 300    random play throughput
+# This is the only module that needs NumPy, which the game itself does
+# not use; install it before using the batch engine:
+#     pip install numpy
+
+
+import argparse, sys, time
+
+import numpy as np
+
+import record
+import state
+
+# A column holds at most its 5 dealt cards and a run of 12 built on them
+HEIGHT = 20
+CODES = state.CODES
+
+STACK_TABLE = np.array(state.CAN_STACK, dtype=bool).reshape(CODES, CODES)
+FOUND_TABLE = np.array(state.CAN_FOUND, dtype=bool).reshape(CODES, CODES)
+
+# option, 0-based source and destination of every move code
+OPTIONS = ('MTT', 'MTC', 'MCT', 'MTF', 'MCF')
+MOVE_OPTION = np.array([OPTIONS.index(move[0]) for move in record.MOVE_CODES], dtype=np.int8)
+MOVE_SRC = np.array([move[1] - 1 for move in record.MOVE_CODES], dtype=np.intp)
+MOVE_DST = np.array([move[2] - 1 for move in record.MOVE_CODES], dtype=np.intp)
+# flat (s, d) places of the MTT moves in a 10 x 10 mask, s == d left out
+MTT_PLACES = np.array([s * 10 + d for s in range(10) for d in range(10) if s != d])
+
+
+class Batch(object):
+    '''
+        N Seahaven games stored as NumPy arrays.
+
+        n: int, number of games, all empty until dealt
+    '''
+
+    def __init__(self, n):
+        self.tableau = np.zeros((n, 10, HEIGHT), dtype=np.uint8)
+        self.heights = np.zeros((n, 10), dtype=np.intp)
+        self.cells = np.zeros((n, 4), dtype=np.uint8)
+        self.foundation = np.zeros((n, 4), dtype=np.uint8)
+        self.home = np.zeros(n, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.home)
+
+    @classmethod
+    def from_states(cls, states):
+        '''
+            This function copies compact States into a batch.
+
+            states: list of State
+            return: Batch
+        '''
+        batch = cls(len(states))
+        for g, st in enumerate(states):
+            for c, col in enumerate(st.tableau):
+                batch.tableau[g, c, :len(col)] = np.frombuffer(bytes(col), dtype=np.uint8)
+                batch.heights[g, c] = len(col)
+            batch.cells[g] = np.frombuffer(bytes(st.cells), dtype=np.uint8)
+            batch.foundation[g] = np.frombuffer(bytes(st.foundation), dtype=np.uint8)
+            batch.home[g] = st.home
+        return batch
+
+    @classmethod
+    def deal(cls, seeds):
+        '''
+            This function deals the game of every seed, the same games
+            initialize(seed) deals.
+
+            seeds: iterable of int
+            return: Batch
+        '''
+        return cls.from_states([state.from_permutation(state.permutation(seed))
+                                for seed in seeds])
+
+    def take(self, games):
+        '''
+            This function copies some of the games into a new batch.
+
+            games: array of game numbers, or a (N,) bool array
+            return: Batch
+        '''
+        batch = Batch.__new__(Batch)
+        batch.tableau = self.tableau[games]
+        batch.heights = self.heights[games]
+        batch.cells = self.cells[games]
+        batch.foundation = self.foundation[games]
+        batch.home = self.home[games]
+        return batch
+
+    def to_state(self, g):
+        '''
+            This function copies game g out of the batch.
+
+            g: int
+            return: State
+        '''
+        tableau = [bytearray(self.tableau[g, c, :self.heights[g, c]].tobytes())
+                   for c in range(10)]
+        return state.State(tableau, bytearray(self.cells[g].tobytes()),
+                           bytearray(self.foundation[g].tobytes()))
+
+    def tops(self):
+        '''
+            return: (N, 10) array, the playable card of every column, 0
+                for an empty column
+        '''
+        last = np.maximum(self.heights - 1, 0)
+        tops = np.take_along_axis(self.tableau, last[:, :, None], axis=2)[:, :, 0]
+        return np.where(self.heights > 0, tops, 0)
+
+    def validate(self, option, src, dst):
+        '''
+            This function checks one move in every game, like the
+            validate_move_* function of the option.
+
+            option: str, such as 'MTT'
+            src: (N,) array of 0-based sources
+            dst: (N,) array of 0-based destinations
+            return: (N,) bool array
+        '''
+        games = np.arange(len(self))
+        if option[1] == 'T':
+            card = self.tops()[games, src]
+        else:
+            card = self.cells[games, src]
+        if option[2] == 'T':
+            ok = STACK_TABLE[card, self.tops()[games, dst]]
+        elif option[2] == 'C':
+            ok = self.cells[games, dst] == state.EMPTY
+        else:
+            ok = FOUND_TABLE[card, self.foundation[games, dst]]
+        if option == 'MTT':
+            ok &= src != dst
+        return ok & (card != state.EMPTY)
+
+    def legal(self):
+        '''
+            This function checks every move in every game at once.
+
+            return: (N, 226) bool array, column k is move
+                record.MOVE_CODES[k]
+        '''
+        n = len(self)
+        tops = self.tops()
+        cells = self.cells
+        has_top = (tops != state.EMPTY)[:, :, None]
+        has_card = (cells != state.EMPTY)[:, :, None]
+        mtt = STACK_TABLE[tops[:, :, None], tops[:, None, :]] & has_top
+        mtc = has_top & (cells == state.EMPTY)[:, None, :]
+        mct = STACK_TABLE[cells[:, :, None], tops[:, None, :]] & has_card
+        mtf = FOUND_TABLE[tops[:, :, None], self.foundation[:, None, :]] & has_top
+        mcf = FOUND_TABLE[cells[:, :, None], self.foundation[:, None, :]] & has_card
+        return np.concatenate((mtt.reshape(n, 100)[:, MTT_PLACES], mtc.reshape(n, 40),
+                               mct.reshape(n, 40), mtf.reshape(n, 40), mcf.reshape(n, 16)),
+                              axis=1)
+
+    def apply(self, codes, mask=None):
+        '''
+            This function plays one move in every game where mask is
+            True, without checking that the moves are legal.
+
+            codes: (N,) array of move codes, see record.MOVE_CODES
+            mask: (N,) bool array, or None for every game
+        '''
+        games = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        codes = codes[games]
+        option = MOVE_OPTION[codes]
+        src = MOVE_SRC[codes]
+        dst = MOVE_DST[codes]
+        from_tableau = (option == 0) | (option == 1) | (option == 3)
+
+        # take the card off its source
+        g, s = games[from_tableau], src[from_tableau]
+        top = self.heights[g, s] - 1
+        card = np.empty(len(games), dtype=np.uint8)
+        card[from_tableau] = self.tableau[g, s, top]
+        self.tableau[g, s, top] = state.EMPTY
+        self.heights[g, s] = top
+        g, s = games[~from_tableau], src[~from_tableau]
+        card[~from_tableau] = self.cells[g, s]
+        self.cells[g, s] = state.EMPTY
+
+        # and put it on its destination
+        to = (option == 0) | (option == 2)
+        g, d = games[to], dst[to]
+        self.tableau[g, d, self.heights[g, d]] = card[to]
+        self.heights[g, d] += 1
+        to = option == 1
+        self.cells[games[to], dst[to]] = card[to]
+        to = option >= 3
+        self.foundation[games[to], dst[to]] = card[to]
+        self.home[games[to]] += 1
+
+    def won(self):
+        '''
+            return: (N,) bool array
+        '''
+        return self.home == 52
+
+
+def random_moves(legal, rng):
+    '''
+        This function picks one legal move at random in every game.
+
+        legal: (N, 226) bool array, as returned by Batch.legal
+        rng: numpy.random.Generator
+        return: tup ((N,) array of move codes, (N,) bool array of games
+            that had a legal move)
+    '''
+    scores = rng.random(legal.shape)
+    scores[~legal] = -1.0
+    return scores.argmax(axis=1), legal.any(axis=1)
+
+
+def play_random(seeds, max_moves=300, seed=0):
+    '''
+        This function plays random legal moves in all the games of seeds
+        in lockstep until they are won, stuck or out of moves. Games that
+        are over leave the batch, so the steps only cost for the games
+        still going.
+
+        seeds: iterable of int, the deals
+        max_moves: int
+        seed: int, seed of the move choices
+        return: tup ((N,) bool array of games won, (N,) array of moves played)
+    '''
+    batch = Batch.deal(seeds)
+    rng = np.random.default_rng(seed)
+    live = np.arange(len(batch))  # game number of every row of batch
+    won = np.zeros(len(batch), dtype=bool)
+    played = np.zeros(len(batch), dtype=np.intp)
+    for i in range(max_moves):
+        codes, active = random_moves(batch.legal(), rng)
+        if not active.all():
+            batch = batch.take(active)
+            live = live[active]
+            codes = codes[active]
+            if not len(live):
+                break
+        batch.apply(codes)
+        played[live] += 1
+        over = batch.won()
+        if over.any():
+            won[live[over]] = True
+            batch = batch.take(~over)
+            live = live[~over]
+    return won, played
+
+
+def main(argv=None):
+    ''' batch engine command line '''
+    parser = argparse.ArgumentParser(description='Random Seahaven games in NumPy lockstep.')
+    parser.add_argument('--games', type=int, default=4096)
+    parser.add_argument('--moves', type=int, default=300, help='moves per game at most')
+    parser.add_argument('--first-seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    won, played = play_random(range(args.first_seed, args.first_seed + args.games), args.moves)
+    elapsed = time.perf_counter() - start
+    print("games:      {} in {:.2f}s ({:.0f}/s)".format(args.games, elapsed, args.games / elapsed))
+    print("moves:      {} ({:.0f}/s)".format(int(played.sum()), played.sum() / elapsed))
+    print("won:        {}".format(int(won.sum())))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
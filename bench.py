@@ -0,0 +1,266 @@
+# Solitaire: Seahaven - benchmarks
+#
+#     python bench.py run -o bench.json           run every benchmark
+#     python bench.py run -k validate -o new.json  only names containing 'validate'
+#     python bench.py compare bench.json new.json --threshold 0.10
+# Every deal comes from a fixed seed, never from the module-level random
+# generator, so two runs time exactly the same work.  Results are written
+# as JSON in ns per operation; compare exits with status 1 when a benchmark
+# got slower than the baseline by more than the threshold.
+
+
+import argparse, contextlib, json, os, platform, random, sys, timeit
+
+import engine
+import movegen
+import solitaire
+import solver
+import state
+
+SEED = 2024
+
+
+def deal(seed=SEED):
+    return solitaire.initialize(seed)
+
+
+def position_with(option, seed=SEED):
+    '''
+        This function plays random legal moves from fixed seeds until a
+        move of the given kind is legal.
+
+        option: str, such as 'MTF'
+        return: tup (game lists, move)
+    '''
+    rng = random.Random(seed)
+    for offset in range(1000):
+        st = state.from_permutation(state.permutation(seed + offset))
+        for ply in range(200):
+            moves = sorted(movegen.legal_moves(st))
+            for move in moves:
+                if move[0] == option:
+                    return state.to_game(st), move
+            if not moves:
+                break
+            state.apply(st, rng.choice(moves))
+    raise RuntimeError("no position with a legal " + option)
+
+
+def micro_benchmarks(null, selected):
+    '''
+        null: text file the display benchmark writes to
+        selected: function name -> bool, the benchmarks to set up
+        return: dict, name -> (function, operations per call)
+    '''
+    benches = {}
+    tableau, foundation, cells = deal()
+    st = state.from_game(tableau, foundation, cells)
+
+    # validators, over every source and destination
+    pairs_tt = [(s, d) for s in range(10) for d in range(10)]
+    pairs_tc = [(s, d) for s in range(10) for d in range(4)]
+    pairs_ct = [(s, d) for s in range(4) for d in range(10)]
+    pairs_cc = [(s, d) for s in range(4) for d in range(4)]
+    benches['solitaire.validate_move_within_tableau'] = (
+        lambda: [solitaire.validate_move_within_tableau(tableau, s, d) for s, d in pairs_tt], 100)
+    benches['solitaire.validate_move_tableau_to_cell'] = (
+        lambda: [solitaire.validate_move_tableau_to_cell(tableau, cells, s, d) for s, d in pairs_tc], 40)
+    benches['solitaire.validate_move_cell_to_tableau'] = (
+        lambda: [solitaire.validate_move_cell_to_tableau(tableau, cells, s, d) for s, d in pairs_ct], 40)
+    benches['solitaire.validate_move_tableau_to_foundation'] = (
+        lambda: [solitaire.validate_move_tableau_to_foundation(tableau, foundation, s, d)
+                 for s, d in pairs_tc], 40)
+    benches['solitaire.validate_move_cell_to_foundation'] = (
+        lambda: [solitaire.validate_move_cell_to_foundation(cells, foundation, s, d)
+                 for s, d in pairs_cc], 16)
+    for option, pairs in (('MTT', pairs_tt), ('MTC', pairs_tc), ('MCT', pairs_ct),
+                          ('MTF', pairs_tc), ('MCF', pairs_cc)):
+        validate = state.VALIDATORS[option]
+        benches['state.' + validate.__name__] = (
+            lambda validate=validate, pairs=pairs: [validate(st, s, d) for s, d in pairs], len(pairs))
+    benches['movegen.legal_moves'] = (lambda: list(movegen.legal_moves(st)), 1)
+
+    # moves, each one made and taken back
+    list_moves = {
+        'MTT': lambda t, f, c, s, d: solitaire.move_within_tableau(t, s, d),
+        'MTC': lambda t, f, c, s, d: solitaire.move_tableau_to_cell(t, c, s, d),
+        'MCT': lambda t, f, c, s, d: solitaire.move_cell_to_tableau(t, c, s, d),
+        'MTF': lambda t, f, c, s, d: solitaire.move_tableau_to_foundation(t, f, s, d),
+        'MCF': lambda t, f, c, s, d: solitaire.move_cell_to_foundation(c, f, s, d),
+    }
+    names = {'MTT': 'move_within_tableau', 'MTC': 'move_tableau_to_cell',
+             'MCT': 'move_cell_to_tableau', 'MTF': 'move_tableau_to_foundation',
+             'MCF': 'move_cell_to_foundation'}
+    for option in engine.OPTIONS:
+        game, (option, s, d) = position_with(option)
+        move = list_moves[option]
+        benches['solitaire.{}+unmove'.format(names[option])] = (
+            lambda game=game, move=move, s=s, d=d: solitaire.unmove(*game, move(*game, s - 1, d - 1)), 1)
+        compact = state.from_game(*game)
+        move = state.MOVES[option]
+        benches['state.{}+unmove'.format(names[option])] = (
+            lambda compact=compact, move=move, s=s, d=d: state.unmove(compact, move(compact, s - 1, d - 1)), 1)
+
+    # deal setup
+    rng = random.Random(SEED)
+    benches['solitaire.initialize'] = (lambda: solitaire.initialize(rng=rng), 1)
+    benches['state.from_permutation'] = (lambda: state.from_permutation(state.permutation(rng=rng)), 1)
+
+    # drawing and win check
+    def display():
+        with contextlib.redirect_stdout(null):
+            solitaire.display(tableau, foundation, cells)
+    benches['solitaire.display'] = (display, 1)
+    benches['solitaire.check_for_win'] = (lambda: solitaire.check_for_win(foundation), 1)
+    benches['state.check_for_win'] = (lambda: state.check_for_win(st), 1)
+    return {name: bench for name, bench in benches.items() if selected(name)}
+
+
+def scripted_games(seeds):
+    '''
+        This function solves the deals of seeds once, so that their
+        solutions can be replayed as scripts.
+
+        return: list of tup (seed, moves)
+    '''
+    scripts = []
+    for seed in seeds:
+        moves = solver.solve(*deal(seed))
+        if moves:
+            scripts.append((seed, moves))
+    return scripts
+
+
+def macro_benchmarks(null, selected):
+    '''
+        null: text file, unused, taken like micro_benchmarks does
+        selected: function name -> bool, the benchmarks to set up; the
+            deals are only solved when a benchmark that needs them is
+        return: dict, name -> (function, operations per call)
+    '''
+    benches = {}
+    scripts = []
+    if selected('games.scripted (per move)') or selected('solver.solve (per deal)'):
+        scripts = scripted_games(range(SEED, SEED + 10))
+    script_moves = sum(len(moves) for seed, moves in scripts)
+
+    def replay_scripts():
+        for seed, moves in scripts:
+            game = engine.GameSession(seed=seed)
+            for move in moves:
+                game.play(move)
+    benches['games.scripted (per move)'] = (replay_scripts, script_moves)
+
+    def random_games():
+        rng = random.Random(SEED)
+        for seed in range(SEED, SEED + 20):
+            game = engine.GameSession(seed=seed)
+            for ply in range(100):
+                moves = list(movegen.legal_moves(game.state))
+                if not moves:
+                    break
+                game.play(rng.choice(moves))
+    benches['games.random (per game)'] = (random_games, 20)
+
+    def text_games():
+        rng = random.Random(SEED)
+        for seed in range(SEED, SEED + 20):
+            game = engine.GameSession(seed=seed)
+            for ply in range(100):
+                option = rng.choice(engine.OPTIONS)
+                game.execute('{} {} {}'.format(option, rng.randint(1, engine.PLACES[option[1]]),
+                                               rng.randint(1, engine.PLACES[option[2]])))
+    benches['games.typed options (per game)'] = (text_games, 20)
+    benches['solver.solve (per deal)'] = (
+        lambda: [solver.solve(*deal(seed)) for seed, moves in scripts[:3]], 3)
+    return {name: bench for name, bench in benches.items() if selected(name)}
+
+
+def measure(function, operations, repeat=5, min_time=0.2):
+    '''
+        This function times a benchmark: the best of repeat runs of enough
+        calls to last min_time seconds.
+
+        return: float, nanoseconds per operation
+    '''
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat, number))
+    return best * 1e9 / (number * operations)
+
+
+def run(pattern=None, repeat=5):
+    '''
+        This function runs the benchmarks whose name contains pattern.
+
+        return: dict ready to be written as JSON
+    '''
+    results = {}
+    selected = lambda name: not pattern or pattern in name
+    with open(os.devnull, 'w') as null:
+        for group in (micro_benchmarks, macro_benchmarks):
+            for name, (function, operations) in group(null, selected).items():
+                results[name] = {'ns_per_op': round(measure(function, operations, repeat), 1)}
+                print("{:<48s}{:>14,.1f} ns".format(name, results[name]['ns_per_op']))
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'results': results}
+
+
+def compare(baseline, current, threshold):
+    '''
+        This function lists the benchmarks slower than in the baseline by
+        more than threshold (0.10 is 10%).
+
+        baseline: dict, as written by run
+        current: dict, as written by run
+        return: list of names that got slower
+    '''
+    slower = []
+    for name, result in sorted(current['results'].items()):
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['ns_per_op']
+        after = result['ns_per_op']
+        change = after / before - 1
+        flag = ''
+        if change > threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        print("{:<48s}{:>12,.1f}{:>12,.1f}{:>+9.1%}{}".format(name, before, after, change, flag))
+    return slower
+
+
+def main(argv=None):
+    ''' benchmark command line '''
+    parser = argparse.ArgumentParser(description='Seahaven benchmarks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', help='JSON file for the results')
+    run_parser.add_argument('-k', '--pattern', help='only benchmarks whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.pattern, args.repeat)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    slower = compare(baseline, current, args.threshold)
+    if slower:
+        print("{} benchmark(s) slower by more than {:.0%}".format(len(slower), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,119 @@
+# Solitaire: Seahaven - cards
+#
+# The 52 cards are made once, when the module is imported, and never
+# again: Card(rank, suit) hands back the one card of that rank and suit.
+# Cards cannot be changed, so every game can share them, and two cards
+# are equal only when they are the same object.  Everything a card is
+# asked for is worked out up front:
+#     rank()     1 (Ace) to 13 (King)
+#     suit()     1 to 4, clubs, diamonds, hearts, spades
+#     index      (rank - 1) * 4 + suit - 1, 0 to 51, its place in CARDS
+#     code       index + 4, the card code of state.py
+#     text       what str() prints, such as ' 9♥'
+
+
+import random
+
+RANKS = ['x', 'A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+SUITS = ['x', '♣', '♦', '♥', '♠']
+
+
+class Card(object):
+    '''
+        A playing card. Card(rank, suit) returns the shared card of that
+        rank and suit rather than a new object.
+
+        rank: int, 1 to 13
+        suit: int, 1 to 4
+    '''
+    __slots__ = ('_rank', '_suit', 'index', 'code', 'text')
+
+    def __new__(cls, rank, suit):
+        if type(rank) != int or type(suit) != int or not (1 <= rank <= 13 and 1 <= suit <= 4):
+            raise ValueError("no card of rank {!r} and suit {!r}".format(rank, suit))
+        return CARDS[(rank - 1) * 4 + suit - 1]
+
+    @classmethod
+    def _make(cls, index):
+        card = object.__new__(cls)
+        for name, value in (('_rank', index // 4 + 1), ('_suit', index % 4 + 1),
+                            ('index', index), ('code', index + 4)):
+            object.__setattr__(card, name, value)
+        object.__setattr__(card, 'text', "{:>2s}{}".format(RANKS[card._rank], SUITS[card._suit]))
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError("cards cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("cards cannot be changed")
+
+    def __reduce__(self):
+        # unpickle to the shared card, not a copy
+        return (Card, (self._rank, self._suit))
+
+    def rank(self):
+        return self._rank
+
+    def suit(self):
+        return self._suit
+
+    def value(self):
+        return self._rank if self._rank < 10 else 10
+
+    def is_face_up(self):
+        return True
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return self.text
+
+
+CARDS = tuple(Card._make(index) for index in range(52))
+
+
+class Deck(object):
+    '''
+        The 52 cards in order, Ace of clubs first. Shuffling moves card
+        indices around, never the cards, and draws from the random module
+        exactly like shuffling a list of 52 cards.
+    '''
+
+    def __init__(self):
+        self._order = list(range(52))
+        self._next = 0  # position of the next card to deal
+
+    def shuffle(self):
+        remaining = self._order[self._next:]
+        random.shuffle(remaining)
+        self._order[self._next:] = remaining
+
+    def deal(self):
+        '''
+            return: Card, the top card of the deck, or None once empty
+        '''
+        if self._next == len(self._order):
+            return None
+        self._next += 1
+        return CARDS[self._order[self._next - 1]]
+
+    def is_empty(self):
+        return self._next == len(self._order)
+
+    def __len__(self):
+        return len(self._order) - self._next
+
+    def __str__(self):
+        return ", ".join(CARDS[index].text for index in self._order[self._next:])
+
+    def __repr__(self):
+        return self.__str__()
+
+    def display(self, cols=13):
+        for position, index in enumerate(self._order[self._next:]):
+            if position % cols == 0:
+                print()
+            print(CARDS[index], end=" ")
+        print()
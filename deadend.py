@@ -0,0 +1,87 @@
+# Solitaire: Seahaven - dead-end detection
+#
+# check() tells when a position can no longer be won, long before the
+# moves run out.  Every card in a cell has to leave it to go home, and
+# while the four cells are full a cell card can only leave onto the
+# foundation or onto a column.  check() works out everything that could
+# ever happen without a cell being freed, optimistically: a card may leave
+# its column as soon as everything above it may, if its suit could reach
+# it on the foundation, if the card one rank above in its suit may become
+# a column end, or if it is a King and a column may become empty.  That
+# overestimates what play can do, so when even then no cell card can
+# leave, the cells stay full for good and the game is lost.  Each card is
+# looked at a few times at most, so the check is about linear in the
+# number of cards.
+
+
+from collections import namedtuple
+
+import movegen
+import state
+from state import EMPTY, KING
+
+# rule: str, 'no-moves' or 'cells-deadlock'
+# cards: tup of the card codes that can never move on (the cells)
+# message: str, for people
+Reason = namedtuple('Reason', 'rule cards message')
+
+
+def check(st):
+    '''
+        This function looks for proof that a position is lost.
+
+        st: State
+        return: Reason, or None when the position may still be won
+    '''
+    cells = st.cells
+    if EMPTY in cells:
+        # a column end can always go to the free cell, and with every
+        # column empty the cards left in cells go home one by one
+        return None
+    tableau = st.tableau
+    ends = [len(col) - 1 for col in tableau]  # deepest card that may become a column end
+    exposed = bytearray(state.CODES)          # card -> 1 once it may become a column end
+    for col in tableau:
+        if col:
+            exposed[col[-1]] = 1
+    reach = bytearray(st.ranks)               # suit -> highest rank that may go home
+    empty = any(end < 0 for end in ends)      # a column may become empty
+    changed = True
+    while changed:
+        changed = False
+        # the foundation may take every card that follows in its suit and may come free
+        for suit in range(4):
+            while reach[suit] < KING:
+                card = (reach[suit] + 1) * 4 + suit
+                if cells.find(card) >= 0:
+                    return None  # that cell may be freed
+                if not exposed[card]:
+                    break
+                reach[suit] += 1
+                changed = True
+        for card in cells:
+            if card >> 2 == KING and empty or card >> 2 < KING and exposed[card + 4]:
+                return None  # the cell card may go onto a column
+        # cards may leave their columns from the end down
+        for col_no, col in enumerate(tableau):
+            end = ends[col_no]
+            while end >= 0:
+                card = col[end]
+                rank = card >> 2
+                if not (rank <= reach[card & 3] + 1
+                        or rank < KING and exposed[card + 4]
+                        or rank == KING and empty):
+                    break
+                end -= 1
+                if end >= 0:
+                    exposed[col[end]] = 1
+                else:
+                    empty = True
+                changed = True
+            ends[col_no] = end
+    # with no legal move at all nothing above could leave either, so that
+    # case ends here too; only now is it worth telling apart
+    if next(movegen.legal_moves(st), None) is None:
+        return Reason('no-moves', tuple(cells), "no legal move is left")
+    return Reason('cells-deadlock', tuple(cells),
+                  "the cells are full and none of their cards can ever leave them")
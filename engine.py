@@ -0,0 +1,297 @@
+# Solitaire: Seahaven - headless game engine
+#
+# GameSession owns one game and plays the MENU options on it without any
+# input() or print(), so that games can be driven from code, a server or
+# a script.  main() in solitaire.py is a client of it.
+
+
+import random
+from collections import namedtuple
+
+import deadend
+import hint
+import instrument
+import snapshot
+import state
+
+OPTIONS = ('MTT', 'MTC', 'MCT', 'MTF', 'MCF')
+
+# how many columns, cells or piles there are for each letter of an option
+PLACES = {'T': 10, 'C': 4, 'F': 4}
+
+# ok: bool, error: str or None, won: bool, version: int,
+# record: tup (option, s, d) of the move played, or None,
+# dead: deadend.Reason when the move left a lost position, or None
+Result = namedtuple('Result', 'ok error won version record dead', defaults=(None,))
+
+
+def parse_option(text):
+    '''
+        This function checks that text has one of the forms requested in
+        the menu, as get_option does.
+
+        text: str
+        return: list [option, s, d] or [option], or None if malformed
+    '''
+    option_list = text.strip().split()
+    if not option_list:
+        return None
+    opt_char = option_list[0][0].upper()
+
+    if opt_char in 'RUTHQ' and len(option_list) == 1:  # correct format
+        return [opt_char]
+
+    if opt_char == 'M' and len(option_list) == 3 and option_list[1].isdigit() \
+            and option_list[2].isdigit():
+        opt_str = option_list[0]
+        if opt_str in OPTIONS:
+            return [opt_str, int(option_list[1]), int(option_list[2])]
+
+    return None  # none of the above
+
+
+class GameSession(object):
+    '''
+        One game of Seahaven, played without terminal I/O.
+
+        state: State, the position
+        perm: bytes, the deal (see state.permutation)
+        dealt: list of move records autoplay played as the game was dealt;
+            they cannot be undone, but replaying the game needs them ahead
+            of history
+        history: list of move records, for undo
+        steps: list of int, number of records in history of every move
+            the player made, the move itself and the cards autoplay sent
+            home after it
+        version: int, bumped by every change of the position
+        autoplay: bool, send home the cards that are safe to send home
+            after every move (see state.cascade)
+        snapshot: Snapshot of the position, replaced after every change,
+            when the session was made with publish=True, otherwise None.
+            Other threads may read it at any time without a lock.
+    '''
+    __slots__ = ('state', 'perm', 'dealt', 'history', 'steps', 'undone', 'version', 'rng',
+                 'autoplay', 'publish', 'snapshot', 'trail')
+
+    def __init__(self, seed=None, rng=None, perm=None, autoplay=False, publish=False):
+        '''
+            Deals from perm when given, otherwise shuffles with rng, a
+            random.Random made from seed, or the module random generator
+            (like initialize()) when neither is given.
+        '''
+        if rng is None and seed is not None:
+            rng = random.Random(seed)
+        self.rng = rng
+        self.autoplay = autoplay
+        self.publish = publish
+        self.snapshot = None
+        self.version = 0
+        self.new_game(perm)
+
+    def new_game(self, perm=None):
+        '''
+            This function deals a new game, from perm when given.
+
+            perm: bytes or None
+            return: Result
+        '''
+        if perm is None:
+            perm = state.permutation(rng=self.rng)
+        self.state = state.from_permutation(perm)
+        self.perm = bytes(perm)
+        self.history = []
+        self.steps = []
+        self.undone = []  # lists of records taken back, for redo
+        self.version += 1
+        self.dealt = []
+        if self.autoplay:
+            # cards that go home as dealt are part of the deal, not a move
+            # the player can take back
+            self.dealt = state.cascade(self.state, None)
+        if self.publish:
+            self.trail = []  # snapshots before every step, for undo
+            self.snapshot = snapshot.from_state(self.state)
+        return Result(True, None, self.won, self.version, None)
+
+    def _played(self, moves, record):
+        '''
+            This function adds a move of the player to the history, with
+            the cards autoplay sends home after it.
+
+            moves: list of records played for the player
+            record: tup, the move just played
+        '''
+        if self.autoplay:
+            moves += state.cascade(self.state, record)
+        if moves:
+            self.history += moves
+            self.steps.append(len(moves))
+            self._publish(moves)
+
+    def _publish(self, moves):
+        '''
+            This function replaces the published snapshot by the one after
+            moves, sharing the columns they did not touch.
+
+            moves: list of records just played
+        '''
+        if self.snapshot is not None:
+            snap = self.snapshot
+            self.trail.append(snap)
+            for record in moves:
+                snap = snap.play(record)
+            self.snapshot = snap
+
+    @property
+    def won(self):
+        return state.check_for_win(self.state)
+
+    @property
+    def progress(self):
+        '''
+            tup (cards home, list of cards still to go for every suit)
+        '''
+        return state.progress(self.state)
+
+    def hint(self):
+        '''
+            return: tup (option, s, d), the move hint.best_move advises,
+                or None when no move is legal
+        '''
+        return hint.hint(self.state)
+
+    def moves(self):
+        '''
+            return: list of every move record played since the deal, the
+                ones autoplay played as the game was dealt first, so that
+                perm and these moves replay the game
+        '''
+        return self.dealt + self.history
+
+    def game(self):
+        '''
+            return: tup (tableau, foundation, cells) as used by display()
+        '''
+        return state.to_game(self.state)
+
+    def play(self, move):
+        '''
+            This function plays a move. While instrument is enabled every
+            phase is counted and timed, and a rejected move counted by its
+            reason.
+
+            move: tup or list (option, s, d) numbered from 1 like
+                get_option returns it, or a str such as 'MTT 3 5'
+            return: Result
+        '''
+        timed = instrument.enabled
+        if isinstance(move, str):
+            start = instrument.clock() if timed else 0
+            parsed = parse_option(move)
+            if timed:
+                instrument.add('parse', start)
+            if parsed is None or len(parsed) != 3:
+                return self._reject("bad option")
+            move = parsed
+        option, s, d = move
+        if option not in OPTIONS:
+            return self._reject("bad option")
+        if not (1 <= s <= PLACES[option[1]] and 1 <= d <= PLACES[option[2]]):
+            return self._reject("no such place")
+        start = instrument.clock() if timed else 0
+        legal = state.VALIDATORS[option](self.state, s - 1, d - 1)
+        if timed:
+            instrument.add('validate', start)
+        if not legal:
+            if timed:
+                instrument.reject(state.reject_reason(self.state, option, s - 1, d - 1))
+            return self._error("illegal move")
+        if timed:
+            start = instrument.clock()
+        record = state.DO_MOVES[option](self.state, s - 1, d - 1)
+        self._played([record], record)
+        if timed:
+            instrument.add('move', start)
+        self.undone = []
+        self.version += 1
+        if timed:
+            start = instrument.clock()
+        won = self.won
+        if timed:
+            instrument.add('win', start)
+        return Result(True, None, won, self.version, record, deadend.check(self.state))
+
+    def undo(self):
+        '''
+            This function takes back the last move, with the cards autoplay
+            sent home after it.
+
+            return: Result, record is the move taken back
+        '''
+        if not self.history:
+            return self._error("no move to undo")
+        count = self.steps.pop()
+        moves = self.history[-count:]
+        del self.history[-count:]
+        for record in reversed(moves):
+            state.unmove(self.state, record)
+        self.undone.append(moves)
+        if self.snapshot is not None:
+            self.snapshot = self.trail.pop()
+        self.version += 1
+        return Result(True, None, False, self.version, moves[0], deadend.check(self.state))
+
+    def redo(self):
+        '''
+            This function plays again the last move taken back.
+
+            return: Result
+        '''
+        if not self.undone:
+            return self._error("no move to redo")
+        moves = self.undone.pop()
+        for record in moves:
+            state.apply(self.state, record)
+        self.history += moves
+        self.steps.append(len(moves))
+        self._publish(moves)
+        self.version += 1
+        return Result(True, None, self.won, self.version, moves[0], deadend.check(self.state))
+
+    def execute(self, option):
+        '''
+            This function carries out a menu option. 'H' and 'Q' leave the
+            game alone, they are for the client to handle. For 'T' the
+            record of the Result is the hinted move, which is not played.
+
+            option: str, or list/tup as returned by parse_option
+            return: Result
+        '''
+        if isinstance(option, str):
+            start = instrument.clock() if instrument.enabled else 0
+            parsed = parse_option(option)
+            if instrument.enabled:
+                instrument.add('parse', start)
+            if parsed is None:
+                return self._error("bad option")
+            option = parsed
+        if len(option) == 3:
+            return self.play(option)
+        if option[0] == 'U':
+            return self.undo()
+        if option[0] == 'R':
+            return self.new_game()
+        if option[0] == 'T':
+            move = self.hint()
+            if move is None:
+                return self._error("no legal move")
+            return Result(True, None, self.won, self.version, move)
+        return Result(True, None, self.won, self.version, None)
+
+    def _reject(self, message):
+        if instrument.enabled:
+            instrument.reject(message)
+        return self._error(message)
+
+    def _error(self, message):
+        return Result(False, message, self.won, self.version, None)
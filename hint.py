@@ -0,0 +1,151 @@
+# Solitaire: Seahaven - hints
+#
+# best_move() looks a few moves ahead from a position and picks the move
+# that leads to the position the solver scores best (see solver.estimate).
+# Hints are kept in an LRU cache shared by every game of the process, so a
+# position that comes back, in the same game after an undo or in another
+# game, is answered without searching again.
+
+
+from collections import OrderedDict
+
+import movegen
+import solver
+import state
+
+DEPTH = 2  # moves looked at, the hinted one included
+WON = -1   # score of a won position, below every estimate
+
+
+def position_key(st):
+    '''
+        This function builds a key of the exact position. Unlike the
+        Zobrist hash it tells apart positions whose columns or cells are
+        in another order, since a hint names columns and cells by number.
+
+        st: State
+        return: bytes
+    '''
+    return bytes(st.cells) + bytes(st.foundation) + b'\0'.join(st.tableau)
+
+
+def lookahead(st, depth, seen):
+    '''
+        This function scores a position by the best position reachable
+        in depth moves, every move followed by the foundation moves that
+        are always safe.
+
+        st: State, left as it was
+        depth: int
+        seen: set of hashes of the positions on the way here
+        return: int, lower is better
+    '''
+    if state.check_for_win(st):
+        return WON
+    best = solver.estimate(st)
+    if depth == 0:
+        return best
+    for move in solver.successors(st):
+        step = [state.apply(st, move)]
+        step += state.cascade(st, step[0])
+        if st.hash not in seen:
+            seen.add(st.hash)
+            best = min(best, lookahead(st, depth - 1, seen))
+            seen.discard(st.hash)
+        for record in reversed(step):
+            state.unmove(st, record)
+        if best == WON:
+            break
+    return best
+
+
+def best_move(st, depth=DEPTH):
+    '''
+        This function finds the move that leads to the best position
+        within depth moves.
+
+        st: State, left as it was
+        depth: int
+        return: tup (option, s, d) numbered from 1, or None if no move is
+            legal
+    '''
+    best = None
+    best_score = None
+    seen = {st.hash}
+    for move in movegen.legal_moves(st):
+        step = [state.apply(st, move)]
+        step += state.cascade(st, step[0])
+        if st.hash in seen:
+            score = None  # same position again, only when nothing else goes
+        else:
+            seen.add(st.hash)
+            score = lookahead(st, depth - 1, seen)
+            seen.discard(st.hash)
+        for record in reversed(step):
+            state.unmove(st, record)
+        if best is None or (score is not None and (best_score is None or score < best_score)):
+            best = move
+            best_score = score
+        if best_score == WON:
+            break
+    return best
+
+
+class HintCache(object):
+    '''
+        Least recently used cache of hints by position.
+
+        size: int, most positions kept
+        depth: int, look-ahead of the hints
+    '''
+
+    def __init__(self, size=100000, depth=DEPTH):
+        self.size = size
+        self.depth = depth
+        self.hints = OrderedDict()  # position key -> move or None
+        self.hits = 0
+        self.misses = 0
+
+    def hint(self, st):
+        '''
+            This function gives the hint of a position, from the cache when
+            the position was seen before.
+
+            st: State
+            return: tup (option, s, d), or None if no move is legal
+        '''
+        key = position_key(st)
+        hints = self.hints
+        if key in hints:
+            self.hits += 1
+            hints.move_to_end(key)
+            return hints[key]
+        self.misses += 1
+        move = hints[key] = best_move(st, self.depth)
+        if len(hints) > self.size:
+            hints.popitem(last=False)
+        return move
+
+    def clear(self):
+        self.hints.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        '''
+            return: dict with hits, misses, hit_rate and the number of
+                positions cached
+        '''
+        asked = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / asked if asked else 0.0, 'size': len(self.hints)}
+
+
+cache = HintCache()  # shared by every game
+
+
+def hint(st):
+    '''
+        st: State
+        return: tup (option, s, d), the hint of the shared cache
+    '''
+    return cache.hint(st)
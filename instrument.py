@@ -0,0 +1,152 @@
+# Solitaire: Seahaven - move pipeline instrumentation
+#
+# Off by default.  While off, the game code only pays for one test of
+# instrument.enabled per call.  Once enable() is called, every phase of a
+# move is counted and timed:
+#     parse     reading an option (get_option / parse_option)
+#     validate  checking a move with a validate_move_* function
+#     move      changing the position with a move function
+#     win       check_for_win
+#     display   drawing the board
+# and every rejected move is counted by its reason (see state.reject_reason).
+# Times go into histograms of power-of-two nanosecond buckets.
+#     python instrument.py 1000    profiles 1000 random games
+
+
+import cProfile, io, json, pstats, random, sys
+from contextlib import contextmanager
+from time import perf_counter_ns as clock
+
+PHASES = ('parse', 'validate', 'move', 'win', 'display')
+
+enabled = False
+counts = {}      # phase -> number of calls
+totals = {}      # phase -> nanoseconds spent
+histograms = {}  # phase -> list of counts, bucket k holds times below 2**k ns
+rejects = {}     # reason -> number of rejected moves
+
+
+def reset():
+    '''
+        This function clears all counters.
+    '''
+    for phase in PHASES:
+        counts[phase] = 0
+        totals[phase] = 0
+        histograms[phase] = [0] * 40
+    rejects.clear()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def add(phase, start):
+    '''
+        This function adds one call of a phase that started at start.
+
+        phase: str, one of PHASES
+        start: int, clock() when the phase started
+    '''
+    elapsed = clock() - start
+    counts[phase] += 1
+    totals[phase] += elapsed
+    histograms[phase][min(elapsed.bit_length(), 39)] += 1
+
+
+def reject(reason):
+    '''
+        reason: str, why a move was rejected
+    '''
+    rejects[reason] = rejects.get(reason, 0) + 1
+
+
+def snapshot():
+    '''
+        This function gathers the counters in a dict that can be written
+        as JSON.
+
+        return: dict
+    '''
+    phases = {}
+    for phase in PHASES:
+        count = counts[phase]
+        histogram = histograms[phase]
+        phases[phase] = {
+            'count': count,
+            'total_ns': totals[phase],
+            'mean_ns': totals[phase] // count if count else 0,
+            # '<N' is the number of calls that took less than N ns
+            'histogram': {'<{}'.format(2 ** k): n for k, n in enumerate(histogram) if n},
+        }
+    return {'enabled': enabled, 'phases': phases, 'rejects': dict(rejects)}
+
+
+def to_json(indent=None):
+    '''
+        return: str, snapshot() as JSON
+    '''
+    return json.dumps(snapshot(), indent=indent)
+
+
+@contextmanager
+def profiling(sort='cumulative'):
+    '''
+        This context manager turns on the counters and cProfile for the
+        code it wraps. It gives a dict whose 'stats' entry holds the
+        pstats.Stats once the block is over.
+    '''
+    was_enabled = enabled
+    enable()
+    profile = cProfile.Profile()
+    result = {}
+    profile.enable()
+    try:
+        yield result
+    finally:
+        profile.disable()
+        if not was_enabled:
+            disable()
+        result['stats'] = pstats.Stats(profile, stream=io.StringIO()).sort_stats(sort)
+
+
+def profile_games(games, moves=200, seed=0):
+    '''
+        This function plays games random games on GameSession objects
+        with profiling() on. Random moves, legal or not, go through the
+        same parsing and checks as typed ones.
+
+        games: int
+        moves: int, moves tried per game
+        seed: int
+        return: pstats.Stats
+    '''
+    import engine
+    rng = random.Random(seed)
+    with profiling() as result:
+        for i in range(games):
+            game = engine.GameSession(seed=seed + i)
+            for j in range(moves):
+                option = rng.choice(engine.OPTIONS)
+                game.play('{} {} {}'.format(option, rng.randint(1, engine.PLACES[option[1]]),
+                                            rng.randint(1, engine.PLACES[option[2]])))
+                if game.won:
+                    break
+    return result['stats']
+
+
+reset()
+
+
+if __name__ == '__main__':
+    import instrument  # the module the game code sees, rather than __main__
+    stats = instrument.profile_games(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
+    stats.stream = sys.stdout
+    stats.print_stats(15)
+    print(instrument.to_json(indent=2))
@@ -0,0 +1,241 @@
+# Solitaire: Seahaven - deal library
+#
+# Solving a deal takes from milliseconds to seconds, far too long to do
+# when a player asks for a game.  The library is built offline: every seed
+# of a range is dealt and searched once, and the outcome is written to a
+# compact file.  Picking a winnable deal of a given difficulty is then a
+# random read from that file:
+#     python library.py build deals.lib --deals 100000 --workers 8
+#     python library.py pick deals.lib easy
+#     python library.py info deals.lib
+# and in code:
+#     seed = DealLibrary('deals.lib').pick('hard')
+#     game = engine.GameSession(seed=seed)
+#
+# File layout, little endian:
+#     HEADER                   magic, first seed, number of deals
+#     per deal, by seed:       ENTRY, status, peak cells, solution length,
+#                              nodes searched
+#     per band of BANDS:       number of deals, then the deal number of
+#                              each one (seed - first seed)
+# Only solved deals are listed in the bands.  Difficulty is the number of
+# positions the solver had to expand: the longer it searched, the fewer
+# ways there are to win.
+
+
+import argparse, mmap, os, random, struct, sys, time
+from collections import namedtuple
+from multiprocessing import Pool
+
+import solver
+import state
+
+MAGIC = b'SHL1'
+HEADER = struct.Struct('<4sQI')
+ENTRY = struct.Struct('<BBHI')
+NUMBER = struct.Struct('<I')
+
+STATUSES = (solver.SOLVED, solver.UNSOLVABLE, solver.UNKNOWN)
+
+# band name, most nodes searched for a deal of the band (None: no limit)
+BANDS = (('easy', 100), ('medium', 1000), ('hard', None))
+
+Entry = namedtuple('Entry', 'status peak_cells length nodes')
+
+
+def band_of(nodes):
+    '''
+        nodes: int, nodes the solver searched to win a deal
+        return: str, name of the band of the deal
+    '''
+    for name, limit in BANDS:
+        if limit is None or nodes <= limit:
+            return name
+
+
+def classify(seed, max_nodes=20000):
+    '''
+        This function solves the deal of a seed and measures it.
+
+        seed: int
+        max_nodes: int, nodes to search before the deal counts as unknown
+        return: Entry
+    '''
+    st = state.from_permutation(state.permutation(seed))
+    result = solver.search(st, max_nodes=max_nodes)
+    peak = 0
+    if result.moves:
+        # play the solution to find the most cells it needs at once
+        for move in result.moves:
+            state.apply(st, move)
+            peak = max(peak, sum(1 for card in st.cells if card != state.EMPTY))
+    return Entry(result.status, peak, len(result.moves or ()), result.nodes)
+
+
+def classify_seeds(task):
+    '''
+        This function classifies a range of seeds, in a worker process.
+
+        task: tup (first seed, last seed + 1, max_nodes)
+        return: list of Entry
+    '''
+    start, stop, max_nodes = task
+    return [classify(seed, max_nodes) for seed in range(start, stop)]
+
+
+def classify_all(tasks, workers):
+    '''
+        This function classifies ranges of seeds, in worker processes
+        unless workers is 1.
+
+        tasks: list of tup, see classify_seeds
+        workers: int, processes to use (all cores when None)
+        return: generator of lists of Entry, in seed order
+    '''
+    if workers == 1:
+        yield from map(classify_seeds, tasks)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(classify_seeds, tasks)
+
+
+def build(path, deals, first_seed=0, workers=None, max_nodes=20000, chunk=100):
+    '''
+        This function classifies deals first_seed .. first_seed + deals - 1
+        and writes the library file.
+
+        path: str
+        deals: int
+        workers: int, processes to use (all cores when None)
+        max_nodes: int, nodes to search per deal
+        return: dict, band name -> number of deals
+    '''
+    tasks = [(seed, min(seed + chunk, first_seed + deals), max_nodes)
+             for seed in range(first_seed, first_seed + deals, chunk)]
+    bands = {name: [] for name, limit in BANDS}
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, first_seed, deals))
+        number = 0
+        for entries in classify_all(tasks, workers):
+            for entry in entries:
+                f.write(ENTRY.pack(STATUSES.index(entry.status), entry.peak_cells,
+                                   entry.length, entry.nodes))
+                if entry.status == solver.SOLVED:
+                    bands[band_of(entry.nodes)].append(number)
+                number += 1
+        for name, limit in BANDS:
+            f.write(NUMBER.pack(len(bands[name])))
+            f.write(b''.join(NUMBER.pack(number) for number in bands[name]))
+    return {name: len(numbers) for name, numbers in bands.items()}
+
+
+class DealLibrary(object):
+    '''
+        Reads a library file through a memory map; nothing is loaded or
+        searched, so every lookup takes the same short time whatever the
+        size of the library.
+
+        path: str
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.first_seed, self.count = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("not a deal library file: " + path)
+        self.bands = {}  # band name -> (offset of its deal numbers, number of deals)
+        offset = HEADER.size + self.count * ENTRY.size
+        for name, limit in BANDS:
+            size = NUMBER.unpack_from(self.map, offset)[0]
+            self.bands[name] = (offset + NUMBER.size, size)
+            offset += NUMBER.size * (size + 1)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, seed):
+        return 0 <= seed - self.first_seed < self.count
+
+    def entry(self, seed):
+        '''
+            seed: int
+            return: Entry of the deal of seed
+        '''
+        if seed not in self:
+            raise KeyError(seed)
+        status, peak, length, nodes = ENTRY.unpack_from(
+            self.map, HEADER.size + (seed - self.first_seed) * ENTRY.size)
+        return Entry(STATUSES[status], peak, length, nodes)
+
+    def counts(self):
+        '''
+            return: dict, band name -> number of winnable deals in it
+        '''
+        return {name: size for name, (offset, size) in self.bands.items()}
+
+    def pick(self, band, rng=None):
+        '''
+            This function picks a winnable deal of a band at random.
+
+            band: str, a name of BANDS
+            rng: random.Random or None for the random module
+            return: int, seed of the deal, for initialize() or GameSession
+        '''
+        if band not in self.bands:
+            raise ValueError("unknown band: " + band)
+        offset, size = self.bands[band]
+        if size == 0:
+            raise IndexError("no {} deals in library".format(band))
+        n = (rng or random).randrange(size)
+        return self.first_seed + NUMBER.unpack_from(self.map, offset + n * NUMBER.size)[0]
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    ''' library command line '''
+    parser = argparse.ArgumentParser(description='Build and read Seahaven deal libraries.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='solve deals and write a library')
+    build_parser.add_argument('path')
+    build_parser.add_argument('--deals', type=int, default=1000)
+    build_parser.add_argument('--first-seed', type=int, default=0)
+    build_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    build_parser.add_argument('--max-nodes', type=int, default=20000)
+    pick_parser = commands.add_parser('pick', help='print the seed of a winnable deal')
+    pick_parser.add_argument('path')
+    pick_parser.add_argument('band', choices=[name for name, limit in BANDS])
+    info_parser = commands.add_parser('info', help='count the deals of a library')
+    info_parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        start = time.monotonic()
+        counts = build(args.path, args.deals, args.first_seed, args.workers, args.max_nodes)
+        print("deals:      {} in {:.1f}s".format(args.deals, time.monotonic() - start))
+        print("winnable:   " + "  ".join("{}:{}".format(name, n) for name, n in counts.items()))
+        return
+    with DealLibrary(args.path) as library:
+        if args.command == 'pick':
+            print(library.pick(args.band))
+            return
+        statuses = dict.fromkeys(STATUSES, 0)
+        for seed in range(library.first_seed, library.first_seed + len(library)):
+            statuses[library.entry(seed).status] += 1
+        print("deals:      {} (seeds {} to {})".format(len(library), library.first_seed,
+                                                       library.first_seed + len(library) - 1))
+        print("status:     " + "  ".join("{}:{}".format(s, n) for s, n in statuses.items()))
+        print("winnable:   " + "  ".join("{}:{}".format(name, n)
+                                         for name, n in library.counts().items()))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+# Solitaire: Seahaven - legal move generation
+#
+# Moves are (option, s, d) tuples, numbered from 1 the way get_option
+# returns them.  legal_moves() lists the moves of a position from the ends
+# of the columns instead of trying every source and destination.
+
+
+import state
+
+COLUMNS = range(10)
+CELLS = range(4)
+PILES = range(4)
+
+
+def legal_moves(st):
+    '''
+        This function yields every legal move of a position: foundation
+        moves first, then cell to tableau, tableau to tableau and
+        tableau to cell moves.
+
+        st: State
+        return: generator of moves (option, s, d)
+    '''
+    tableau = st.tableau
+    cells = st.cells
+    foundation = st.foundation
+    ends = {}  # card at the end of a column -> column number
+    empty_cols = []
+    for col_no in COLUMNS:
+        col = tableau[col_no]
+        if col:
+            ends[col[-1]] = col_no + 1
+        else:
+            empty_cols.append(col_no + 1)
+    empty_piles = [pile_no + 1 for pile_no in PILES if foundation[pile_no] == state.EMPTY]
+    tops = {top + 4: pile_no + 1 for pile_no, top in enumerate(foundation) if top}
+
+    for card, col_no in ends.items():
+        if card >> 2 == state.ACE:
+            for pile_no in empty_piles:
+                yield ('MTF', col_no, pile_no)
+        elif card in tops:
+            yield ('MTF', col_no, tops[card])
+    for cell_no in CELLS:
+        card = cells[cell_no]
+        if card == state.EMPTY:
+            continue
+        if card >> 2 == state.ACE:
+            for pile_no in empty_piles:
+                yield ('MCF', cell_no + 1, pile_no)
+        elif card in tops:
+            yield ('MCF', cell_no + 1, tops[card])
+    for cell_no in CELLS:
+        card = cells[cell_no]
+        if card == state.EMPTY:
+            continue
+        if card >> 2 == state.KING:
+            for col_no in empty_cols:
+                yield ('MCT', cell_no + 1, col_no)
+        elif card + 4 in ends:
+            yield ('MCT', cell_no + 1, ends[card + 4])
+    for card, col_no in ends.items():
+        if card >> 2 == state.KING:
+            for dst_no in empty_cols:
+                yield ('MTT', col_no, dst_no)
+        elif card + 4 in ends:
+            yield ('MTT', col_no, ends[card + 4])
+    free_cells = [cell_no + 1 for cell_no in CELLS if cells[cell_no] == state.EMPTY]
+    for col_no in ends.values():
+        for cell_no in free_cells:
+            yield ('MTC', col_no, cell_no)
+
@@ -0,0 +1,224 @@
+# Solitaire: Seahaven - binary game records
+#
+# A record file holds any number of games:
+#     MAGIC                               4 bytes
+#     per game:
+#         deal                            52 bytes, see state.permutation
+#         move count                      2 bytes, little endian
+#         moves                           1 byte each, see MOVE_CODES
+#     index (written by RecordWriter.close):
+#         offset of every game            8 bytes each, little endian
+#         number of games                 8 bytes
+#         INDEX_MAGIC                     4 bytes
+# A file without its index (say a writer that was killed) can still be read
+# from start to end, only random access needs the index.  The index is only
+# trusted when its offsets fit the file and its last game ends where it
+# starts, since moves may end in the bytes of INDEX_MAGIC too, and a last
+# game that was cut short is left out.
+
+
+import mmap, struct
+
+import solitaire
+import state
+
+MAGIC = b'SHG1'
+INDEX_MAGIC = b'SHIX'
+DEAL_SIZE = 52
+COUNT = struct.Struct('<H')
+OFFSET = struct.Struct('<Q')
+
+# every move there is, the byte of a move is its place in this list
+MOVE_CODES = [(option, s, d)
+              for option, sources, places in (('MTT', 10, 10), ('MTC', 10, 4), ('MCT', 4, 10),
+                                               ('MTF', 10, 4), ('MCF', 4, 4))
+              for s in range(1, sources + 1)
+              for d in range(1, places + 1)
+              if not (option == 'MTT' and s == d)]
+MOVE_INDEX = {move: code for code, move in enumerate(MOVE_CODES)}
+
+
+def encode_moves(moves):
+    '''
+        moves: list of moves (option, s, d)
+        return: bytes, one per move
+    '''
+    return bytes(MOVE_INDEX[tuple(move)] for move in moves)
+
+
+def decode_moves(data):
+    '''
+        data: bytes, one per move
+        return: list of moves (option, s, d)
+    '''
+    return [MOVE_CODES[code] for code in data]
+
+
+class RecordWriter(object):
+    '''
+        Appends games to a record file as they come, and writes the index
+        of the games when closed.
+
+        path: str
+    '''
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.offsets = []
+
+    def write(self, perm, moves):
+        '''
+            This function adds one game.
+
+            perm: bytes, the deal
+            moves: list of moves (option, s, d), or bytes already encoded
+        '''
+        state.check_permutation(perm)
+        if not isinstance(moves, (bytes, bytearray)):
+            moves = encode_moves(moves)
+        self.offsets.append(self.file.tell())
+        self.file.write(bytes(perm))
+        self.file.write(COUNT.pack(len(moves)))
+        self.file.write(moves)
+
+    def write_game(self, game):
+        '''
+            This function adds the deal and the moves of a GameSession.
+
+            game: GameSession
+        '''
+        self.write(game.perm, game.moves())
+
+    def close(self):
+        index = b''.join(OFFSET.pack(offset) for offset in self.offsets)
+        self.file.write(index + OFFSET.pack(len(self.offsets)) + INDEX_MAGIC)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader(object):
+    '''
+        Reads a record file through a memory map, so that files far bigger
+        than memory can be read. Games come as (deal, move bytes) pairs;
+        decode_moves() turns the bytes into moves.
+
+        path: str
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:4] != MAGIC:
+            raise ValueError("not a game record file: " + path)
+        self.end = len(self.map)  # end of the games
+        self.index = None  # offset of the index, if the file has one
+        self.count = None
+        if self.end >= len(MAGIC) + 12 and self.map[-4:] == INDEX_MAGIC:
+            count = OFFSET.unpack_from(self.map, self.end - 12)[0]
+            index = self.end - 12 - count * OFFSET.size
+            if self._index_fits(index, count):
+                self.count = count
+                self.index = index
+                self.end = index
+
+    def _index_fits(self, index, count):
+        '''
+            This function checks that an index of count games starting at
+            index matches the games before it: the first game right after
+            MAGIC and the last one ending where the index starts.
+        '''
+        if index < len(MAGIC):
+            return False
+        if count == 0:
+            return index == len(MAGIC)
+        first = OFFSET.unpack_from(self.map, index)[0]
+        last = OFFSET.unpack_from(self.map, index + (count - 1) * OFFSET.size)[0]
+        if first != len(MAGIC) or not first <= last <= index - DEAL_SIZE - COUNT.size:
+            return False
+        read = self._read(last, index)
+        return read is not None and read[1] == index
+
+    def __len__(self):
+        if self.count is None:
+            self.count = sum(1 for game in self)
+        return self.count
+
+    def _read(self, offset, end):
+        '''
+            This function reads the game at offset.
+
+            offset: int
+            end: int, where the games stop
+            return: tup ((deal, move bytes), offset of the next game), or
+                None when the game does not fit before end
+        '''
+        if offset + DEAL_SIZE + COUNT.size > end:
+            return None
+        deal = self.map[offset:offset + DEAL_SIZE]
+        offset += DEAL_SIZE
+        count = COUNT.unpack_from(self.map, offset)[0]
+        offset += COUNT.size
+        if offset + count > end:
+            return None
+        return (deal, self.map[offset:offset + count]), offset + count
+
+    def __iter__(self):
+        offset = len(MAGIC)
+        while offset < self.end:
+            read = self._read(offset, self.end)
+            if read is None:
+                return  # the last game was cut short
+            game, offset = read
+            yield game
+
+    def __getitem__(self, n):
+        '''
+            This function reads game n straight from the index.
+
+            n: int
+            return: tup (deal, move bytes)
+        '''
+        if self.index is None:
+            raise IndexError("record file has no index")
+        if n < 0:
+            n += self.count
+        if not 0 <= n < self.count:
+            raise IndexError("no game {} in record file".format(n))
+        offset = OFFSET.unpack_from(self.map, self.index + n * OFFSET.size)[0]
+        read = self._read(offset, self.end)
+        if read is None:
+            raise ValueError("game {} does not fit in record file".format(n))
+        return read[0]
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(perm, moves):
+    '''
+        This function deals a game like initialize() and plays the moves
+        of a record on it.
+
+        perm: bytes, the deal
+        moves: list of moves (option, s, d), or bytes
+        return: tup (tableau, foundation, cells)
+    '''
+    if isinstance(moves, (bytes, bytearray)):
+        moves = decode_moves(moves)
+    tableau, foundation, cells = solitaire.deal_from_permutation(perm)
+    for number, move in enumerate(moves):
+        if not solitaire.play_move(tableau, foundation, cells, move):
+            raise ValueError("illegal move {}: {} {} {}".format(number + 1, *move))
+    return (tableau, foundation, cells)
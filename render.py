@@ -0,0 +1,133 @@
+# Solitaire: Seahaven - board rendering
+#
+# frame() builds the whole board printed by display() as one string, so
+# that it goes out with a single write.  Renderer can also redraw only the
+# rows that changed since the last frame, moving the cursor with ANSI
+# escape codes, for clients that own the whole terminal, as main() does
+# when its output is a terminal.
+
+
+import sys
+
+CLEAR = '\x1b[H\x1b[2J'  # cursor home, clear screen
+ERASE = '\x1b[K'         # clear to the end of the line
+ERASE_BELOW = '\x1b[J'   # clear from the cursor to the end of the screen
+
+
+def card_text(card):
+    '''
+        card: Card
+        return: str, the text of the card, made once by the cards module
+    '''
+    return card.text
+
+
+def lines(tableau, foundation, cells):
+    '''
+        This function lays out the cells and foundation at the top and the
+        tableau below, one str per line of the board.
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        return: list of str
+    '''
+    top = []
+    for f in foundation[:2]:
+        # fill space where card would be so foundation gets printed in the right place
+        top.append(card_text(f[-1]) + ' ' if f else '    ')
+    top.append('   ')
+    for c in cells:
+        top.append(card_text(c) + ' ' if c else '[  ]')
+    top.append('   ')
+    for f in foundation[2:]:
+        top.append(card_text(f[-1]) + ' ' if f else '  ')
+
+    board = ['',
+             "{:<11s}{:^16s}{:>10s}".format("foundation", "cell", "foundation"),
+             "{:>14s}{:>4s}{:>4s}{:>4s}".format("1", "2", "3", "4"),
+             ''.join(top),
+             '',
+             'tableau',
+             '    ' + ''.join("{:>2d}  ".format(i) for i in range(1, 11))]
+    # determine the number of rows in the longest column
+    max_col = max([len(i) for i in tableau])
+    for row in range(max_col):
+        line = ["{:>2d} ".format(row + 1)]
+        for col in tableau:
+            # check that a card exists before trying to print it
+            line.append(card_text(col[row]) + ' ' if row < len(col) else '    ')
+        board.append(''.join(line))
+    board.append('')
+    return board
+
+
+def frame(tableau, foundation, cells):
+    '''
+        This function builds the text display() prints.
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        return: str
+    '''
+    return '\n'.join(lines(tableau, foundation, cells)) + '\n'
+
+
+class Renderer(object):
+    '''
+        Draws boards on a terminal, sending only the rows that changed
+        since the previous board.
+
+        out: file to write to, sys.stdout by default
+        ansi: bool, when False every board is written in full, as by display()
+    '''
+
+    def __init__(self, out=None, ansi=True):
+        self.out = out if out is not None else sys.stdout
+        self.ansi = ansi
+        self.last = None  # lines of the board on screen
+
+    def reset(self):
+        '''
+            This function forgets the board on screen, so that the next one
+            is drawn in full (after the screen was written over).
+        '''
+        self.last = None
+
+    def draw(self, tableau, foundation, cells):
+        '''
+            This function draws the board with a single write.
+
+            tableau: nested list
+            foundation: nested list
+            cells: list
+            return: int, number of lines written
+        '''
+        board = lines(tableau, foundation, cells)
+        last = self.last
+        if not self.ansi:
+            text = '\n'.join(board) + '\n'
+            count = len(board)
+        elif last is None:
+            text = CLEAR + '\n'.join(board) + '\n'
+            count = len(board)
+        else:
+            out = []
+            for row in range(max(len(board), len(last))):
+                line = board[row] if row < len(board) else ''
+                if row >= len(last) or line != last[row]:
+                    out.append('\x1b[{};1H{}{}'.format(row + 1, line, ERASE))
+            count = len(out)
+            if count > len(board) // 2:
+                # most of the board changed, a full frame is shorter
+                text = CLEAR + '\n'.join(board) + '\n'
+                count = len(board)
+            else:
+                # park the cursor below and clear what was printed there
+                out.append('\x1b[{};1H{}'.format(len(board) + 1, ERASE_BELOW))
+                text = ''.join(out)
+        self.out.write(text)
+        self.out.flush()
+        self.last = board
+        return count
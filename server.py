@@ -0,0 +1,223 @@
+# Solitaire: Seahaven - game server
+#
+# Serves one game per connection over TCP or a Unix socket:
+#     python server.py serve --port 7878
+#     python server.py load --port 7878 --clients 200 --commands 500
+# The client sends MENU options, one per line (MTT 3 5, R, U, T, H, Q).  The
+# server answers every line with one line:
+#     STATE <version> <columns> <cells> <foundation>   whole position
+#     OK <version> <option> <s> <d> <card>             move played
+#     WON <version> <option> <s> <d> <card>            move played, game won
+#     UNDO <version> <option> <s> <d> <card>           move taken back
+#     HINT <version> <option> <s> <d>                  move advised, not played
+#     ERR <version> <message>
+#     HELP <options>
+#     BYE
+# Cards are written as rank and suit letters, 'TD' for the ten of diamonds,
+# and '-' stands for an empty cell, pile or column.  A client that keeps
+# the position only has to apply each OK/UNDO line to stay in step.
+
+
+import argparse, asyncio, random, sys, time
+
+import engine
+
+RANKS = '-A23456789TJQK'
+SUITS = 'CDHS'
+
+
+def card_name(code):
+    '''
+        code: int, card code
+        return: str, such as 'QH', or '-' for no card
+    '''
+    if code == 0:
+        return '-'
+    return RANKS[code >> 2] + SUITS[code & 3]
+
+
+def state_line(game):
+    '''
+        This function writes the whole position of a game: columns are
+        separated by '/', cells and piles by ':'.
+
+        game: GameSession
+        return: str
+    '''
+    st = game.state
+    columns = '/'.join(''.join(card_name(code) for code in col) or '-' for col in st.tableau)
+    cells = ':'.join(card_name(code) for code in st.cells)
+    foundation = ':'.join(card_name(code) for code in st.foundation)
+    return 'STATE {} {} {} {}'.format(game.version, columns, cells, foundation)
+
+
+def moved_card(game, record):
+    '''
+        This function finds the card a move put at its destination.
+    '''
+    option, s, d = record
+    st = game.state
+    if option[2] == 'T':
+        return st.tableau[d - 1][-1]
+    if option[2] == 'C':
+        return st.cells[d - 1]
+    return st.foundation[d - 1]
+
+
+def respond(game, line):
+    '''
+        This function carries out one line from a client.
+
+        game: GameSession
+        line: str
+        return: tup (answer line, True when the client quits)
+    '''
+    option = engine.parse_option(line)
+    if option is None:
+        return ('ERR {} bad option'.format(game.version), False)
+    if option[0] == 'Q':
+        return ('BYE', True)
+    if option[0] == 'H':
+        return ('HELP MTT MTC MCT MTF MCF R U T H Q', False)
+    if option[0] == 'U':
+        if not game.history:
+            return ('ERR {} no move to undo'.format(game.version), False)
+        # the card is found before the move is taken back
+        card = card_name(moved_card(game, game.history[-1]))
+        result = game.undo()
+        return ('UNDO {} {} {} {} {}'.format(result.version, *result.record, card), False)
+    result = game.execute(option)
+    if option[0] == 'T' and result.ok:
+        return ('HINT {} {} {} {}'.format(result.version, *result.record), False)
+    if option[0] == 'R':
+        return (state_line(game), False)
+    if not result.ok:
+        return ('ERR {} {}'.format(result.version, result.error), False)
+    return ('{} {} {} {} {} {}'.format('WON' if result.won else 'OK', result.version,
+                                        *result.record, card_name(moved_card(game, result.record))),
+            False)
+
+
+class GameServer(object):
+    '''
+        Hosts one GameSession per connection.
+
+        seed: int or None, seed for the deals of all connections
+    '''
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed) if seed is not None else None
+        self.sessions = 0  # connections open now
+
+    async def handle(self, reader, writer):
+        game = engine.GameSession(rng=self.rng)
+        self.sessions += 1
+        try:
+            writer.write((state_line(game) + '\n').encode())
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # longer than the stream limit, the rest of it cannot be
+                    # told apart from the next command
+                    writer.write('ERR {} line too long\n'.format(game.version).encode())
+                    break
+                if not line:
+                    break
+                answer, done = respond(game, line.decode('ascii', 'replace'))
+                writer.write((answer + '\n').encode())
+                if done:
+                    break
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=7878, unix=None):
+        '''
+            return: asyncio server, listening on a TCP port or on the
+                Unix socket path unix when given
+        '''
+        if unix:
+            return await asyncio.start_unix_server(self.handle, unix, backlog=4096)
+        return await asyncio.start_server(self.handle, host, port, backlog=4096)
+
+
+async def serve(host, port, unix, seed):
+    server = await GameServer(seed).start(host, port, unix)
+    print("Serving Seahaven on", unix or "{}:{}".format(host, port))
+    async with server:
+        await server.serve_forever()
+
+
+async def load_client(connect, commands, rng, latencies):
+    reader, writer = await connect()
+    await reader.readline()  # STATE of the new game
+    for i in range(commands):
+        kind = rng.choice(engine.OPTIONS)
+        line = '{} {} {}\n'.format(kind, rng.randint(1, engine.PLACES[kind[1]]),
+                                   rng.randint(1, engine.PLACES[kind[2]]))
+        start = time.perf_counter()
+        writer.write(line.encode())
+        await reader.readline()
+        latencies.append(time.perf_counter() - start)
+    writer.write(b'Q\n')
+    await reader.readline()
+    writer.close()
+
+
+async def load(host, port, unix, clients, commands, idle, seed):
+    '''
+        This function opens clients connections that each send commands
+        random moves and wait for every answer, plus idle connections
+        that stay open without sending anything, then prints the
+        throughput and latency.
+    '''
+    if unix:
+        connect = lambda: asyncio.open_unix_connection(unix)
+    else:
+        connect = lambda: asyncio.open_connection(host, port)
+    idle_conns = []
+    for i in range(idle):
+        idle_conns.append(await connect())
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(load_client(connect, commands, random.Random(rng.random()), latencies)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    for reader, writer in idle_conns:
+        writer.close()
+    latencies.sort()
+    print("clients:    {} busy, {} idle".format(clients, idle))
+    print("commands:   {} in {:.2f}s ({:.0f}/s)".format(len(latencies), elapsed,
+                                                      len(latencies) / elapsed))
+    if latencies:
+        print("latency:    p50 {:.3f} ms, p99 {:.3f} ms".format(
+            latencies[len(latencies) // 2] * 1000, latencies[len(latencies) * 99 // 100] * 1000))
+
+
+def main(argv=None):
+    ''' server command line '''
+    parser = argparse.ArgumentParser(description='Seahaven game server and load generator.')
+    parser.add_argument('mode', choices=('serve', 'load'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7878)
+    parser.add_argument('--unix', help='Unix socket path, instead of TCP')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--clients', type=int, default=100, help='load: busy connections')
+    parser.add_argument('--commands', type=int, default=100, help='load: commands per client')
+    parser.add_argument('--idle', type=int, default=0, help='load: idle connections')
+    args = parser.parse_args(argv)
+    if args.mode == 'serve':
+        asyncio.run(serve(args.host, args.port, args.unix, args.seed))
+    else:
+        asyncio.run(load(args.host, args.port, args.unix, args.clients, args.commands,
+                         args.idle, args.seed))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
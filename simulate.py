@@ -0,0 +1,168 @@
+# Solitaire: Seahaven - batch simulation
+#
+# Plays many deals with a move policy and reports the win rate:
+#     python -m solitaire simulate --deals 1000000 --workers 8 --policy greedy
+# Every deal is dealt from its own seed, and every worker process gets its
+# own range of seeds, so results do not depend on the number of workers.
+
+
+import argparse, math, os, random, sys, time
+from multiprocessing import Pool
+
+import deadend
+import movegen
+import solver
+import state
+
+
+def deal(seed):
+    '''
+        This function deals the game for one seed, the same game that
+        initialize(seed) deals.
+
+        seed: int
+        return: State
+    '''
+    return state.from_permutation(state.permutation(seed))
+
+
+def greedy_policy(st, rng):
+    '''
+        This policy ranks the moves by how close each one brings the
+        game to a win, as scored by the solver, looking one move ahead.
+
+        st: State
+        rng: random.Random
+        return: list of moves, best first
+    '''
+    scored = []
+    for move in list(movegen.legal_moves(st)):
+        record = state.apply(st, move)
+        scored.append((solver.estimate(st), len(scored), move))
+        state.unmove(st, record)
+    scored.sort()
+    return [move for score, order, move in scored]
+
+
+def random_policy(st, rng):
+    '''
+        This policy plays any legal move.
+
+        st: State
+        rng: random.Random
+        return: list of moves, best first
+    '''
+    moves = list(movegen.legal_moves(st))
+    rng.shuffle(moves)
+    return moves
+
+
+POLICIES = {
+    'greedy': greedy_policy,
+    'random': random_policy,
+}
+
+
+def play(st, policy, rng, max_moves=500):
+    '''
+        This function plays a game with a policy, never going back to a
+        position it has already seen nor going into one that is lost (see
+        deadend.check). The game stops when every move is one of those.
+
+        st: State, played in place
+        policy: function (st, rng) -> list of moves, best first
+        rng: random.Random
+        max_moves: int
+        return: tup (won, moves, max_cells)
+    '''
+    seen = {st.hash}
+    moves = 0
+    max_cells = 4 - st.cells.count(state.EMPTY)
+    while moves < max_moves and not state.check_for_win(st):
+        for move in policy(st, rng):
+            record = state.apply(st, move)
+            if st.hash not in seen and deadend.check(st) is None:
+                break
+            state.unmove(st, record)
+        else:
+            break  # no move leads anywhere new and alive
+        seen.add(st.hash)
+        moves += 1
+        max_cells = max(max_cells, 4 - st.cells.count(state.EMPTY))
+    return (state.check_for_win(st), moves, max_cells)
+
+
+def play_seeds(task):
+    '''
+        This function plays a range of seeds, in a worker process.
+
+        task: tup (first seed, last seed + 1, policy name, max_moves)
+        return: list of tup (seed, won, moves, max_cells)
+    '''
+    start, stop, policy_name, max_moves = task
+    policy = POLICIES[policy_name]
+    outcomes = []
+    for seed in range(start, stop):
+        won, moves, max_cells = play(deal(seed), policy, random.Random(seed), max_moves)
+        outcomes.append((seed, won, moves, max_cells))
+    return outcomes
+
+
+def run(deals, workers=None, policy='greedy', first_seed=0, max_moves=500, chunk=1000):
+    '''
+        This function plays deals first_seed .. first_seed + deals - 1
+        and yields their outcomes as the workers finish them.
+
+        deals: int
+        workers: int, processes to use (all cores when None)
+        policy: str, one of POLICIES
+        chunk: int, most deals in a worker task; smaller runs get smaller
+            tasks so that every worker has some
+        return: generator of tup (seed, won, moves, max_cells)
+    '''
+    if policy not in POLICIES:
+        raise ValueError("unknown policy: " + policy)
+    chunk = max(1, min(chunk, math.ceil(deals / ((workers or os.cpu_count() or 1) * 4))))
+    tasks = [(seed, min(seed + chunk, first_seed + deals), policy, max_moves)
+             for seed in range(first_seed, first_seed + deals, chunk)]
+    if workers == 1:
+        for task in tasks:
+            yield from play_seeds(task)
+        return
+    with Pool(workers) as pool:
+        for outcomes in pool.imap_unordered(play_seeds, tasks):
+            yield from outcomes
+
+
+def main(argv=None):
+    ''' simulate command line '''
+    parser = argparse.ArgumentParser(prog='solitaire simulate',
+                                     description='Play many Seahaven deals with a move policy.')
+    parser.add_argument('--deals', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--max-moves', type=int, default=500)
+    parser.add_argument('--chunk', type=int, default=1000, help='most deals per worker task')
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    played = won = moves = 0
+    cells_used = [0] * 5  # deals by the most cells they had in use at once
+    for seed, win, count, max_cells in run(args.deals, args.workers, args.policy,
+                                           args.first_seed, args.max_moves, args.chunk):
+        played += 1
+        won += win
+        moves += count
+        cells_used[max_cells] += 1
+    elapsed = time.monotonic() - start
+
+    print("deals:      {}".format(played))
+    print("won:        {} ({:.2%})".format(won, won / played if played else 0))
+    print("avg moves:  {:.1f}".format(moves / played if played else 0))
+    print("max cells:  " + "  ".join("{}:{}".format(i, n) for i, n in enumerate(cells_used)))
+    print("deals/s:    {:.0f}".format(played / elapsed if elapsed else 0))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
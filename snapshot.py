@@ -0,0 +1,127 @@
+# Solitaire: Seahaven - immutable snapshots
+#
+# A Snapshot is a position that never changes: columns are bytes in a
+# tuple, cells and foundation are bytes.  A move makes a new snapshot that
+# shares every column the move did not touch with the one before it, so a
+# snapshot costs a tuple of 10 references and the one or two columns that
+# changed.  Snapshots can be handed to any number of threads, which read
+# them without locks while the game goes on, and any snapshot can be the
+# start of other lines of play (apply() again, or fork() for a search).
+#
+# A Snapshot has the fields of a State that the read-only functions use,
+# so state.VALIDATORS, state.check_for_win, state.progress, state.to_game,
+# movegen.legal_moves, solver.estimate and deadend.check all take one.
+
+
+import state
+from state import EMPTY, CODES
+from zobrist import STACK, CELL, FOUND
+
+
+class Snapshot(object):
+    '''
+        Compact Seahaven position that cannot be changed.
+
+        tableau: tup of 10 bytes, the end of each one is the playable card
+        cells: bytes of 4 card codes (0 when the cell is empty)
+        foundation: bytes of 4 card codes, the top card of each pile
+        hash: int, Zobrist hash of the position, the same as its State's
+        home: int, number of cards on the foundation
+        ranks: bytes of 4 ranks, the top foundation rank of every suit
+    '''
+    __slots__ = ('tableau', 'cells', 'foundation', 'hash', 'home', 'ranks')
+
+    def __new__(cls, tableau, cells, foundation, hash, home, ranks):
+        snap = object.__new__(cls)
+        for name, value in (('tableau', tableau), ('cells', cells), ('foundation', foundation),
+                            ('hash', hash), ('home', home), ('ranks', ranks)):
+            object.__setattr__(snap, name, value)
+        return snap
+
+    def __setattr__(self, name, value):
+        raise AttributeError("snapshots cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("snapshots cannot be changed")
+
+    def __reduce__(self):
+        return (Snapshot, (self.tableau, self.cells, self.foundation, self.hash, self.home,
+                           self.ranks))
+
+    def apply(self, move):
+        '''
+            This function plays a move given the way get_option returns
+            it, with 1-based source and destination numbers.
+
+            move: tup (option, s, d)
+            return: Snapshot after the move, or None if the move is illegal
+        '''
+        option, s, d = move
+        if option not in state.VALIDATORS or not state.VALIDATORS[option](self, s - 1, d - 1):
+            return None
+        return self.play(move)
+
+    def play(self, record):
+        '''
+            This function plays a move without checking that it is legal,
+            such as a record returned by the move functions.
+
+            record: tup (option, s, d)
+            return: Snapshot after the move
+        '''
+        option, s, d = record
+        s -= 1
+        d -= 1
+        tableau = list(self.tableau)
+        cells = self.cells
+        foundation = self.foundation
+        h = self.hash
+        home = self.home
+        ranks = self.ranks
+        if option[1] == 'T':
+            col = tableau[s]
+            card = col[-1]
+            col = tableau[s] = col[:-1]
+            h ^= STACK[card * CODES + (col[-1] if col else EMPTY)]
+        else:
+            card = cells[s]
+            cells = cells[:s] + bytes((EMPTY,)) + cells[s + 1:]
+            h ^= CELL[card]
+        if option[2] == 'T':
+            col = tableau[d]
+            h ^= STACK[card * CODES + (col[-1] if col else EMPTY)]
+            tableau[d] = col + bytes((card,))
+        elif option[2] == 'C':
+            h ^= CELL[card]
+            cells = cells[:d] + bytes((card,)) + cells[d + 1:]
+        else:
+            h ^= FOUND[foundation[d]] ^ FOUND[card]
+            foundation = foundation[:d] + bytes((card,)) + foundation[d + 1:]
+            home += 1
+            suit = card & 3
+            ranks = ranks[:suit] + bytes((card >> 2,)) + ranks[suit + 1:]
+        return Snapshot(tuple(tableau), cells, foundation, h, home, ranks)
+
+    def fork(self):
+        '''
+            return: State, a mutable copy to play or search on
+        '''
+        st = state.State.__new__(state.State)
+        st.tableau = [bytearray(col) for col in self.tableau]
+        st.cells = bytearray(self.cells)
+        st.foundation = bytearray(self.foundation)
+        st.hash = self.hash
+        st.home = self.home
+        st.ranks = bytearray(self.ranks)
+        return st
+
+
+def from_state(st):
+    '''
+        This function takes a snapshot of a State.
+
+        st: State
+        return: Snapshot
+    '''
+    return Snapshot(tuple(bytes(col) for col in st.tableau), bytes(st.cells),
+                    bytes(st.foundation), st.hash, st.home, bytes(st.ranks))
@@ -1,7 +1,11 @@
 # Solitaire: Seahaven
 
 
-import cards, random
+import argparse, cards, random, sys
+import engine
+import instrument
+import render
+import state
 
 random.seed(100)  # random number generator will always generate
 
@@ -13,117 +17,56 @@ Input options:
     MTF s d: Move card from end of Tableau column s to Foundation d.
     MCF s d: Move card from end of Cell s to Foundation d.
     R: Restart the game (after shuffling)
+    U: Undo the last move
+    T: Show a hint for the next move
     H: Display this menu of choices
     Q: Quit the game       
 '''
 
 
-def initialize():
+def initialize(seed=None, rng=None):
     '''
-        This function calls the Deck class from cards to shuffle and deal 52
-        cards, 50 cards dealt evenly into the 10 nested lists in the tableau list and the
+        This function shuffles the 52 cards and deals them, 50 cards
+        evenly into the 10 nested lists in the tableau list and the
         remaining 2 cards into the cells list and creates the foundation list.
+        Without a seed or rng the module random generator is used.
 
+        seed: int or None
+        rng: random.Random or None
         return: tup (tableau, foundation, cells)
     '''
+    return deal_from_permutation(state.permutation(seed, rng))
+
+
+def deal_from_permutation(perm):
+    '''
+        This function deals a game from a shuffled order of deck indices
+        (see state.permutation), so that a stored deal can be rebuilt.
+        Card i of the order goes to the end of column i % 10, the last
+        two cards go to cells 2 and 3.
+
+        perm: bytes
+        return: tup (tableau, foundation, cells)
+    '''
+    state.check_permutation(perm)
+    deck = [cards.CARDS[i] for i in perm]
+    tableau = [deck[col:50:10] for col in range(10)]
     foundation = [[], [], [], []]
-    tableau = [[], [], [], [], [], [], [], [], [], []]
-    cells = []
-    cards_list = []
-    deck = cards.Deck()
-    deck.shuffle()
-    cards_list = [deck.deal() for i in range(52)]  # place full deck into a list
-    # sort 50 cards into each list into tableau one by one
-    for lst in tableau:
-        list_count = 0
-        index = 0
-        while len(lst) <= 5:
-            tableau[list_count].append(cards_list[index])
-            list_count += 1
-            index += 1
-            if list_count == 10:
-                list_count = 0
-    # make sure each list in tableau has 5 cards
-    new_tab = []
-    for lst in tableau:
-        new_lst = lst[:5]
-        new_tab.append(new_lst)
-    tab_lst = []  # list of 50 cards in tableau, to get the 2 remaining cards
-    for lst in new_tab:
-        for card in lst:
-            tab_lst.append(card)
-    for card in cards_list:
-        if card not in tab_lst:
-            cells.append(card)
-    cells.append(None)
-    final_cells = [None] + cells[:]
-    tup = (new_tab, foundation, final_cells)
-    return tup
+    cells = [None, deck[50], deck[51], None]
+    return (tableau, foundation, cells)
 
 
 
 def display(tableau, foundation, cells):
     '''Display the cell and foundation at the top.
-       Display the tableau below.'''
-
-    print("\n{:<11s}{:^16s}{:>10s}".format("foundation", "cell", "foundation"))
-    print("{:>14s}{:>4s}{:>4s}{:>4s}".format("1", "2", "3", "4"))
-    for i, f in enumerate(foundation):
-        if f and (i == 0 or i == 1):
-            print(f[-1], end=' ')  # print first card in stack(list) on foundation
-        elif i == 0 or i == 1:
-            print("{:4s}".format(" "),
-                  end='')  # fill space where card would be so foundation gets printed in the right place
-    print("{:3s}".format(' '), end='')
-    for c in cells:
-        if c:
-            print(c, end=' ')  # print first card in stack(list) on foundation
-        else:
-            print("[  ]", end='')  # fill space where card would be so foundation gets printed in the right place
-    print("{:3s}".format(' '), end='')
-    for i, f in enumerate(foundation):
-        if f and (i == 2 or i == 3):
-            print(f[-1], end=' ')  # print first card in stack(list) on foundation
-        elif i == 2 or i == 3:
-            print("{}{}".format(" ", " "),
-                  end='')  # fill space where card would be so foundation gets printed in the right place
-
-    print()
-    print("\ntableau")
-    print("   ", end=' ')
-    for i in range(1, 11):
-        print("{:>2d} ".format(i), end=' ')
-    print()
-    # determine the number of rows in the longest column
-    max_col = max([len(i) for i in tableau])
-    for row in range(max_col):
-        print("{:>2d}".format(row + 1), end=' ')
-        for col in range(10):
-            # check that a card exists before trying to print it
-            if row < len(tableau[col]):
-                print(tableau[col][row], end=' ')
-            else:
-                print("   ", end=' ')
-        print()  # carriage return at the end of each row
-    print()  # carriage return after printing the whole tableau
-
-def convert_card(card):
-    '''
-        This function converts a card that does not
-        have a numeric value into a numeric value.
-
-        card: string
-        return: string
-    '''
-    if card == "K":   # change king card to value of 13
-        card = card.replace("K", "13")
-    if card == "Q":   # change Queen card to value of 12
-        card = card.replace("Q", "12")
-    if card == "J":   # change Jack card to value of 11
-        card = card.replace("J", "11")
-    if card == "A":   # change Ace card to value of 1
-        card = card.replace("A", "1")
-    return card
+       Display the tableau below.
+       The board is built in one string and written at once.'''
+    if instrument.enabled:
+        start = instrument.clock()
+        sys.stdout.write(render.frame(tableau, foundation, cells))
+        instrument.add('display', start)
+    else:
+        sys.stdout.write(render.frame(tableau, foundation, cells))
 
 def validate_move_within_tableau(tableau, src_col, dst_col):
     '''
@@ -138,44 +81,11 @@ def validate_move_within_tableau(tableau, src_col, dst_col):
     '''
     if tableau[src_col] == []:  # check if card exists
         return False
-    source_str = ""   # source card as str
-    destination_str = ""  # destination card as str
-    source = str(tableau[src_col][-1])  # convert source card into str
-    source_str += source
-    source_str = source_str.replace(" ", "")
-
+    source = state.encode(tableau[src_col][-1])
     # if destination column is empty, only king is allowed
     if tableau[dst_col] == []:
-        if source_str[0] == "K":
-            return True
-        else:
-            return False
-
-    destination = str(tableau[dst_col][-1])  # convert destination card into str
-    destination_str += destination
-    destination_str = destination_str.replace(" ", "")
-
-    # check to see if symbols match up
-    if source_str[-1] == destination_str[-1]:
-        # if card is king, queen, ace, or jack, convert to numeric value
-        if source_str[0] in "KQJA":
-            c = convert_card(source_str[0])
-            source_str = source_str.replace(source_str[0], str(c))
-        if destination_str[0] in "KQJA":
-            c = convert_card(destination_str[0])
-            destination_str = destination_str.replace(destination_str[0], str(c))
-        # get numeric values of both cards, so they can be compared
-        source_lst = [source_str[0:-1], source_str[-1]]  # convert str to list, in case of double digits
-        destination_lst = [destination_str[0:-1], destination_str[-1]]
-        source_num = int(source_lst[0])
-        destination_num = int(destination_lst[0])
-
-        if source_num + 1 == destination_num:  # check numeric values
-            return True
-        else:
-            return False
-    else:
-        return False
+        return state.CAN_STACK[source * state.CODES]
+    return state.CAN_STACK[source * state.CODES + state.encode(tableau[dst_col][-1])]
 
 
 
@@ -192,39 +102,11 @@ def validate_move_cell_to_tableau(tableau, cells, cell_no, dst_col):
     '''
     if cells[cell_no] == None:  # check if card exists
         return False
-    cells_str = str(cells[cell_no])  # card from cell as str
-    cells_str = cells_str.replace(" ", "")
+    source = state.encode(cells[cell_no])
     # if destination column is empty, only king is allowed
     if tableau[dst_col] == []:
-        if cells_str[0] == "K":
-            return True
-        else:
-            return False
-    destination_str = str(tableau[dst_col][-1])  # destination card as str
-    destination_str = destination_str.replace(" ", "")
-
-    # check if symbols match
-    if cells_str[-1] == destination_str[-1]:
-        # if card is king, queen, ace, or jack, convert to numeric value
-        if cells_str[0] in "KQJA":
-            c = convert_card(cells_str[0])
-            cells_str = cells_str.replace(cells_str[0], str(c))
-        if destination_str[0] in "KQJA":
-            c = convert_card(destination_str[0])
-            destination_str = destination_str.replace(destination_str[0], str(c))
-
-        # get card from cell and destination values, so they can be compared
-        cells_lst = [cells_str[0:-1], cells_str[-1]]  # convert str to list, in case of double digits
-        cells_num = int(cells_lst[0])
-        destination_lst = [destination_str[0:-1], destination_str[-1]]
-        destination_num = int(destination_lst[0])
-
-        if cells_num + 1 == destination_num:  # check values of cards
-            return True
-        else:
-            return False
-    else:
-        return False
+        return state.CAN_STACK[source * state.CODES]
+    return state.CAN_STACK[source * state.CODES + state.encode(tableau[dst_col][-1])]
 
 
 
@@ -265,38 +147,11 @@ def validate_move_tableau_to_foundation(tableau, foundation, src_col, found_no):
 
     if tableau[src_col] == []: # check of card exists
         return False
-
-    source_str = str(tableau[src_col][-1])  # source card as str
-    source_str = source_str.replace(" ", "")
-    # check if foundation is empty and if card is ace
+    source = state.encode(tableau[src_col][-1])
+    # an empty foundation only takes an ace
     if foundation[found_no] == []:
-        if source_str[0] == "A":
-            return True
-        else:
-            return False
-
-    foundation_str = str(foundation[found_no][-1])  # last foundation card as str
-    foundation_str = foundation_str.replace(" ", "")
-    # check symbols of the two cards
-    if foundation_str[-1] == source_str[-1]:
-        # if card is king, queen, ace, or jack, convert to numeric value
-        if source_str[0] in "KQJA":
-            c = convert_card(source_str[0])
-            source_str = source_str.replace(source_str[0], str(c))
-        if foundation_str[0] in "KQJA":
-            c = convert_card(foundation_str[0])
-            foundation_str = foundation_str.replace(foundation_str[0], str(c))
-        # get the numeric value of source and foundation card, so they can be compared
-        source_lst = [source_str[0:-1], source_str[-1]]  # convert str to list, in case of double digits
-        source_num = int(source_lst[0])
-        foundation_lst = [foundation_str[0:-1], foundation_str[-1]]
-        foundation_num = int(foundation_lst[0])
-        if source_num - 1 == foundation_num:  # check values of cards
-            return True
-        else:
-            return False
-    else:
-        return False
+        return state.CAN_FOUND[source * state.CODES]
+    return state.CAN_FOUND[source * state.CODES + state.encode(foundation[found_no][-1])]
 
 
 
@@ -317,38 +172,11 @@ def validate_move_cell_to_foundation(cells, foundation, cell_no, found_no):
     except:
         return False
 
-    cell_str = str(cells[cell_no])  # cell card as str
-    cell_str = cell_str.replace(" ", "")
-    # check if foundation is empty and if card is ace
+    source = state.encode(cells[cell_no])
+    # an empty foundation only takes an ace
     if foundation[found_no] == []:
-        if cell_str[0] == "A":
-            return True
-        else:
-            return False
-
-    foundation_str = str(foundation[found_no][-1])  # last foundation card as string
-    foundation_str = foundation_str.replace(" ", "")
-    # check symbols of foundation and cell cards
-    if foundation_str[-1] == cell_str[-1]:
-        # if card is king, queen, ace, or jack, convert to numeric value
-        if cell_str[0] in "KQJA":
-            c = convert_card(cell_str[0])
-            cell_str = cell_str.replace(cell_str[0], str(c))
-        if foundation_str[0] in "KQJA":
-            c = convert_card(foundation_str[0])
-            foundation_str = foundation_str.replace(foundation_str[0], str(c))
-        # get numeric values of cell and foundation cards, so they can be compared
-        cell_lst = [cell_str[0:-1], cell_str[-1]]  # convert str to list, in case of double digits
-        cell_num = int(cell_lst[0])
-        foundation_lst = [foundation_str[0:-1], foundation_str[-1]]
-        foundation_num = int(foundation_lst[0])
-
-        if cell_num - 1 == foundation_num:  # check values
-            return True
-        else:
-            return False
-    else:
-        return False
+        return state.CAN_FOUND[source * state.CODES]
+    return state.CAN_FOUND[source * state.CODES + state.encode(foundation[found_no][-1])]
 
 
 
@@ -362,14 +190,14 @@ def move_within_tableau(tableau, src_col, dst_col):
         tableau: nested list
         src_col: int
         dst_col: int
-        return: bool
+        return: tup (option, s, d), the move record for unmove(), or False
     '''
     condition = validate_move_within_tableau(tableau, src_col, dst_col)
     if condition:
         # update tableau
         tableau[dst_col].append(tableau[src_col][-1])
         tableau[src_col].pop()
-        return True
+        return ('MTT', src_col + 1, dst_col + 1)
     else:
         return False
 
@@ -383,7 +211,7 @@ def move_tableau_to_cell(tableau, cells, src_col, cell_no):
         cells: list
         src_col: int
         cell_no: int
-        return: bool
+        return: tup (option, s, d), the move record for unmove(), or False
     '''
 
     condition = validate_move_tableau_to_cell(tableau, cells, src_col, cell_no)
@@ -391,7 +219,7 @@ def move_tableau_to_cell(tableau, cells, src_col, cell_no):
         # update tableau and cells
         cells[cell_no] = tableau[src_col][-1]
         tableau[src_col].pop()
-        return True
+        return ('MTC', src_col + 1, cell_no + 1)
     else:
         return False
 
@@ -405,14 +233,14 @@ def move_cell_to_tableau(tableau, cells, cell_no, dst_col):
         cells: list
         cell_no: int
         dst_col: int
-        return: bool
+        return: tup (option, s, d), the move record for unmove(), or False
     '''
     condition = validate_move_cell_to_tableau(tableau, cells, cell_no, dst_col)
     if condition:
         # update tableau and cells
         tableau[dst_col].append(cells[cell_no])
         cells[cell_no] = None
-        return True
+        return ('MCT', cell_no + 1, dst_col + 1)
     else:
         return False
 
@@ -425,14 +253,14 @@ def move_cell_to_foundation(cells, foundation, cell_no, found_no):
         foundation: nested list
         cell_no: int
         param found_no: int
-        return: bool
+        return: tup (option, s, d), the move record for unmove(), or False
     '''
     condition = validate_move_cell_to_foundation(cells, foundation, cell_no, found_no)
     if condition:
         # update cells and foundation
         foundation[found_no].append(cells[cell_no])
         cells[cell_no] = None
-        return True
+        return ('MCF', cell_no + 1, found_no + 1)
     else:
         return False
 
@@ -447,18 +275,68 @@ def move_tableau_to_foundation(tableau, foundation, src_col, found_no):
         foundation: nested list
         src_col: int
         found_no: int
-        return: bool
+        return: tup (option, s, d), the move record for unmove(), or False
     '''
     condition = validate_move_tableau_to_foundation(tableau, foundation, src_col, found_no)
     if condition:
         # update tableau and foundation
         foundation[found_no].append(tableau[src_col][-1])
         tableau[src_col].pop()
-        return True
+        return ('MTF', src_col + 1, found_no + 1)
     else:
         return False
 
 
+def play_move(tableau, foundation, cells, move):
+    '''
+        This function makes a move given the way get_option returns it,
+        with 1-based source and destination numbers.
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        move: tup (option, s, d)
+        return: tup, the move record, or False
+    '''
+    option, src, dst = move[0], move[1] - 1, move[2] - 1
+    if option == "MTT":
+        return move_within_tableau(tableau, src, dst)
+    if option == "MTC":
+        return move_tableau_to_cell(tableau, cells, src, dst)
+    if option == "MCT":
+        return move_cell_to_tableau(tableau, cells, src, dst)
+    if option == "MTF":
+        return move_tableau_to_foundation(tableau, foundation, src, dst)
+    if option == "MCF":
+        return move_cell_to_foundation(cells, foundation, src, dst)
+    return False
+
+
+def unmove(tableau, foundation, cells, record):
+    '''
+        This function takes back a move, given the record the move
+        function returned. Moves must be taken back in the reverse order
+        they were made.
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        record: tup (option, s, d)
+    '''
+    option, src, dst = record[0], record[1] - 1, record[2] - 1
+    if option == "MTT":
+        tableau[src].append(tableau[dst].pop())
+    elif option == "MTC":
+        tableau[src].append(cells[dst])
+        cells[dst] = None
+    elif option == "MCT":
+        cells[src] = tableau[dst].pop()
+    elif option == "MTF":
+        tableau[src].append(foundation[dst].pop())
+    elif option == "MCF":
+        cells[src] = foundation[dst].pop()
+
+
 def check_for_win(foundation):
     '''
         This function checks to see if all 52 cards are
@@ -467,14 +345,9 @@ def check_for_win(foundation):
         foundation: nested list
         return: bool
     '''
-    count = 0  # count of cards in foundation list
-    for lst in foundation:
-        for card in lst:
-            count += 1
-    if count == 52:  # check if all cards in deck are in foundation
-        return True
-    else:
-        return False
+    # every pile holds ace..top of one suit, so only the lengths matter
+    return len(foundation[0]) + len(foundation[1]) + len(foundation[2]) \
+        + len(foundation[3]) == 52
 
 
 
@@ -488,137 +361,171 @@ def get_option():
     MTF s d: Move card from end of Tableau column s to Foundation d.
     MCF s d: Move card from Cells s to Foundation d.
     R: Restart the game (after shuffling)
+    U: Undo the last move
+    T: Show a hint for the next move
     H: Display this menu of choices
     Q: Quit the game
     '''
-    option = input("\nInput an option (MTT,MTC,MCT,MTF,MCF,R,H,Q): ")
-    option_list = option.strip().split()
-
-    opt_char = option_list[0][0].upper()
-
-    if opt_char in 'RHQ' and len(option_list) == 1:  # correct format
-        return [opt_char]
-
-    if opt_char == 'M' and len(option_list) == 3 and option_list[1].isdigit() \
-            and option_list[2].isdigit():
-        opt_str = option_list[0]
-        if opt_str in ['MTT', 'MTC', 'MCT', 'MTF', 'MCF']:
-            return [opt_str, int(option_list[1]), int(option_list[2])]
+    option = input("\nInput an option (MTT,MTC,MCT,MTF,MCF,R,U,T,H,Q): ")
+    if instrument.enabled:
+        start = instrument.clock()
+        option_list = engine.parse_option(option)
+        instrument.add('parse', start)
+    else:
+        option_list = engine.parse_option(option)
+    if option_list is None:
+        print("Error in option:", option)
+    return option_list
 
-    print("Error in option:", option)
-    return None  # none of the above
 
+def main(autoplay=False):
+    '''
+        main
 
-def main():
-    ''' main '''
+        autoplay: bool, send home the cards that are safe to send home
+            after every move
+    '''
+    game = engine.GameSession(autoplay=autoplay)
+    # on a terminal the board stays at the top of the screen and only its
+    # rows that changed are drawn again, with what was printed below it
+    # cleared; otherwise every new board is printed in full
+    screen = render.Renderer() if sys.stdout.isatty() else None
+
+    def show(changed=True):
+        if screen is None:
+            if changed:
+                display(*game.game())
+            return
+        start = instrument.clock() if instrument.enabled else 0
+        screen.draw(*game.game())
+        if instrument.enabled:
+            instrument.add('display', start)
+
+    show()
     print("\nWelcome to Seahaven Solitaire.\n")
-    tableau, foundation, cells = initialize()
-    display(tableau, foundation, cells)
     print(MENU)
-    option = get_option()
-    if option == None:
-        option = get_option()  # ask user for another option if get_option returns None
     # loop function for user input
-    while option != None:
-        if option[0] == "MTC":
-            # verify move and update display
-            move = move_tableau_to_cell(tableau, cells, option[1] - 1, option[2] - 1)
-            if move:
-                win = check_for_win(foundation) # check if user won after every move
-                if win:
-                    print("You won!")
-                    display(tableau, foundation, cells)
-                    print("\n- - - - New Game. - - - -")
-                    tableau, foundation, cells = initialize()  # start new game if user won
-                    display(tableau, foundation, cells)
-                    print(MENU)
-                    pass  # don't display again if user won
-                display(tableau, foundation, cells)  # only display if move is valid
-
-            else:  # display error if move can't be done
-                print("Error in move: " + option[0] + " , " + str(option[1]) + " , " + str(option[2]))
-
-        # all options follow the same structure
-
-        if option[0] == "MTT":
-            move = move_within_tableau(tableau, option[1] - 1, option[2] - 1)
-            if move:
-                win = check_for_win(foundation)
-                if win:
-                    print("You won!")
-                    display(tableau, foundation, cells)
-                    print("\n- - - - New Game. - - - -")
-                    tableau, foundation, cells = initialize()
-                    display(tableau, foundation, cells)
-                    print(MENU)
-                    pass
-                display(tableau, foundation, cells)
+    while True:
+        option = get_option()
+        if option == None:  # ask user for another option
+            if screen is not None:  # keep the errors from scrolling the board away
+                show(False)
+                print("Error in option.")
+            continue
+        if option[0] == "Q":  # exit game
+            break
+        if option[0] == "H":  # print Menu
+            show(False)
+            print(MENU)
+            continue
+        if option[0] == "T":  # show a hint, the board stays as it is
+            result = game.execute(option)
+            show(False)
+            if result.ok:
+                print("Hint: {} {} {}".format(*result.record))
             else:
-                print("Error in move: " + option[0] + " , " + str(option[1]) + " , " + str(option[2]))
+                print("No legal move left.")
+            continue
 
-        if option[0] == "MCF":
-            move = move_cell_to_foundation(cells, foundation, option[1] - 1, option[2] - 1)
-            if move:
-                win = check_for_win(foundation)
-                if win:
-                    print("You won!")
-                    display(tableau, foundation, cells)
-                    print("\n- - - - New Game. - - - -")
-                    tableau, foundation, cells = initialize()
-                    display(tableau, foundation, cells)
-                    print(MENU)
-                    pass
-                display(tableau, foundation, cells)
+        result = game.execute(option)
+        if option[0] == "R":  # restarted game
+            show()
+            print(MENU)
+        elif not result.ok:  # display error if move can't be done
+            show(False)
+            if option[0] == "U":
+                print("No move to undo.")
             else:
                 print("Error in move: " + option[0] + " , " + str(option[1]) + " , " + str(option[2]))
+        elif result.won:  # check if user won after every move
+            show()
+            print("You won!")
+            if screen is not None:  # the next board is drawn over this one
+                input("Press Enter for a new game.")
+            print("\n- - - - New Game. - - - -")
+            game.new_game()  # start new game if user won
+            show()
+            print(MENU)
+        else:
+            show()  # only display if move is valid
+            if result.dead:  # warn as soon as the game cannot be won
+                print("This game can no longer be won: {}.".format(result.dead.message))
+                print("Undo (U) or restart (R).")
 
-        if option[0] == "MTF":
-            move = move_tableau_to_foundation(tableau, foundation, option[1] - 1, option[2] - 1)
-            if move:
-                win = check_for_win(foundation)
-                if win:
-                    print("You won!")
-                    display(tableau, foundation, cells)
-                    print("\n- - - - New Game. - - - -")
-                    tableau, foundation, cells = initialize()
-                    display(tableau, foundation, cells)
-                    print(MENU)
-                    pass
-                display(tableau, foundation, cells)
-            else:
-                print("Error in move: " + option[0] + " , " + str(option[1]) + " , " + str(option[2]))
+    print("Thank you for playing.")
 
-        if option[0] == "MCT":
-            move = move_cell_to_tableau(tableau, cells, option[1] - 1, option[2] - 1)
-            if move:
-                win = check_for_win(foundation)
-                if win:
-                    print("You won!")
-                    display(tableau, foundation, cells)
-                    print("\n- - - - New Game. - - - -")
-                    tableau, foundation, cells = initialize()
-                    display(tableau, foundation, cells)
-                    print(MENU)
-                    pass
-                display(tableau, foundation, cells)
-            else:
-                print("Error in move: " + option[0] + " , " + str(option[1]) + " , " + str(option[2]))
 
-        if option[0] == "H":  # print Menu
-            print(MENU)
-        if option[0] == "Q":  # exit game
+def run_script(lines, game):
+    '''
+        This function plays a whole list of options, the way main() would
+        if they were typed in, without prompts or boards. Every line is
+        parsed before the first one is played. Blank lines are skipped. As
+        in main(), a won game is followed by a new one and Q stops the
+        script.
+
+        lines: list of str, one option per line
+        game: GameSession
+        return: dict with the number of commands, of moves played and of
+            games won, and errors, a list of (line number, message)
+    '''
+    options = [engine.parse_option(line) if line.strip() else () for line in lines]
+    errors = [(number + 1, "Error in option: " + lines[number])
+              for number, option in enumerate(options) if option is None]
+    moves = won = 0
+    for number, option in enumerate(options):
+        if not option or option[0] in "HT":
+            continue
+        if option[0] == "Q":
             break
-        if option[0] == "R":  # restart game
-            tableau, foundation, cells = initialize()
-            display(tableau, foundation, cells)
-            print(MENU)
-
-        option = get_option()  # display option after every move
+        result = game.execute(option)
+        if not result.ok:
+            if option[0] == "U":
+                errors.append((number + 1, "No move to undo."))
+            else:
+                errors.append((number + 1, "Error in move: {} , {} , {}".format(*option)))
+        elif len(option) == 3:
+            moves += 1
+            if result.won:
+                won += 1
+                game.new_game()
+    errors.sort()
+    return {'commands': sum(1 for option in options if option != ()), 'moves': moves,
+            'won': won, 'errors': errors}
+
+
+def script(lines, autoplay=False):
+    '''
+        This function plays a script of options and prints one summary:
+        the errors, the counts and the board at the end.
 
-    print("Thank you for playing.")
+        lines: list of str
+        autoplay: bool
+    '''
+    game = engine.GameSession(autoplay=autoplay)
+    summary = run_script(lines, game)
+    out = ["line {}: {}\n".format(number, message) for number, message in summary['errors']]
+    out.append("{} commands, {} moves played, {} errors, {} games won\n".format(
+        summary['commands'], summary['moves'], len(summary['errors']), summary['won']))
+    out.append(render.frame(*game.game()))
+    sys.stdout.write(''.join(out))
 
 
 
 if __name__ == '__main__':
-    main()
-
+    if sys.argv[1:2] == ['simulate']:  # python -m solitaire simulate ...
+        import simulate
+        simulate.main(sys.argv[2:])
+    else:
+        parser = argparse.ArgumentParser(description='Play Seahaven solitaire.')
+        parser.add_argument('--script', metavar='PATH',
+                            help='play the options in a file, one a line, and print a summary')
+        parser.add_argument('--autoplay', action='store_true',
+                            help='send home the cards that are safe to send home')
+        args = parser.parse_args()
+        if args.script:  # python solitaire.py --script moves.txt
+            with open(args.script) as f:
+                script(f.read().splitlines(), args.autoplay)
+        elif not sys.stdin.isatty():  # options piped in
+            script(sys.stdin.read().splitlines(), args.autoplay)
+        else:
+            main(args.autoplay)
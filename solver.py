@@ -0,0 +1,208 @@
+# Solitaire: Seahaven - solver
+#
+# Best-first search over compact positions (see state.py).  Moves are
+# returned the way get_option returns them: ('MTT', s, d) with 1-based
+# numbers, so a solution can be typed straight into the game.
+
+
+import heapq, random, sys, time
+from collections import namedtuple
+
+import deadend
+import state
+
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+UNKNOWN = 'unknown'  # a node, time or memory limit was reached
+
+Result = namedtuple('Result', 'status moves nodes')
+
+
+def auto_foundation(st, record=None):
+    '''
+        This function moves every card that can go to the foundation
+        from the end of a column or from a cell, until none is left;
+        see state.cascade.
+
+        st: State
+        record: tup, the move just played, so that only the places it
+            touched are looked at, or None for the whole position
+        return: list of moves played
+    '''
+    return state.cascade(st, record)
+
+
+def successors(st):
+    '''
+        This function lists the tableau and cell moves worth trying from
+        a position. Moves to an empty cell or an empty column only go to
+        the first one, since the others give the same position.
+
+        st: State
+        return: list of moves
+    '''
+    moves = []
+    tableau = st.tableau
+    empty_col = -1
+    for col_no, col in enumerate(tableau):
+        if not col:
+            empty_col = col_no
+            break
+    free_cell = -1
+    for cell_no, card in enumerate(st.cells):
+        if card == state.EMPTY:
+            free_cell = cell_no
+            break
+    # cards from cells back onto the tableau
+    for cell_no, card in enumerate(st.cells):
+        if card == state.EMPTY:
+            continue
+        if card >> 2 == state.KING:
+            if empty_col >= 0:
+                moves.append(('MCT', cell_no + 1, empty_col + 1))
+            continue
+        for col_no, col in enumerate(tableau):
+            if col and col[-1] == card + 4:
+                moves.append(('MCT', cell_no + 1, col_no + 1))
+                break
+    for src_no, src in enumerate(tableau):
+        if not src:
+            continue
+        card = src[-1]
+        if card >> 2 == state.KING:
+            # a King that already heads its column has nowhere better to go
+            if empty_col >= 0 and len(src) > 1:
+                moves.append(('MTT', src_no + 1, empty_col + 1))
+        else:
+            for dst_no, dst in enumerate(tableau):
+                if dst and dst[-1] == card + 4:
+                    moves.append(('MTT', src_no + 1, dst_no + 1))
+                    break
+        if free_cell >= 0:
+            moves.append(('MTC', src_no + 1, free_cell + 1))
+    return moves
+
+
+def estimate(st):
+    '''
+        This function scores how far a position is from being won;
+        lower is better.
+
+        st: State
+        return: int
+    '''
+    # next rank needed on the foundation for every suit
+    need = [rank + 1 for rank in st.ranks]
+    score = (52 - st.home) * 4
+    for card in st.cells:
+        if card:
+            score += 6
+    for col in st.tableau:
+        for depth in range(len(col) - 1):
+            card = col[depth]
+            above = col[depth + 1]
+            if above + 4 != card:
+                # out of sequence cards must move out of the way again
+                score += 2
+            if card >> 2 == need[card & 3]:
+                # a card the foundation waits for, buried under the rest
+                score += 2 * (len(col) - depth - 1)
+    return score
+
+
+def search(st, max_nodes=100000, time_limit=None, max_states=1000000, weight=0, prune=True):
+    '''
+        This function looks for a way to win from a position with
+        best-first search. Positions already seen are kept in a
+        transposition table under their Zobrist hash, which ignores the
+        order of cells and columns, so that the same position reached by
+        other move orders is expanded only once.
+
+        st: State, left untouched
+        max_nodes: int, positions to expand before giving up
+        time_limit: float or None, seconds before giving up
+        max_states: int, largest size of the transposition table
+        weight: int, cost of every move played so far in the score; 0 is
+            plain best-first, higher values search more like A* and give
+            shorter solutions at the price of more nodes
+        prune: bool, never expand positions deadend.check finds lost;
+            False searches them too, to check deadend.check itself
+        return: Result (status, moves, nodes)
+    '''
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    start = st.copy()
+    first = auto_foundation(start)
+    start_key = start.hash
+    parents = {start_key: None}  # key -> (parent key, moves from parent)
+    heap = [(estimate(start), 0, 0, start_key, start)]
+    count = 0  # tie breaker so that states are never compared
+    nodes = 0
+    limited = False
+    while heap:
+        score, order, cost, cur_key, cur = heapq.heappop(heap)
+        if state.check_for_win(cur):
+            moves = []
+            while parents[cur_key] is not None:
+                cur_key, step = parents[cur_key]
+                moves[:0] = step
+            return Result(SOLVED, first + moves, nodes)
+        nodes += 1
+        if nodes > max_nodes or len(parents) > max_states or \
+                (deadline is not None and nodes % 256 == 0 and time.monotonic() > deadline):
+            limited = True
+            break
+        for move in successors(cur):
+            # play the move in place and take it back, only new positions get copied
+            step = [state.apply(cur, move)]
+            step += auto_foundation(cur, step[0])
+            child_key = cur.hash
+            if child_key not in parents:
+                parents[child_key] = (cur_key, step)
+                if not prune or deadend.check(cur) is None:  # lost positions are never expanded
+                    count += 1
+                    heapq.heappush(heap, (estimate(cur) + (cost + 1) * weight, count, cost + 1,
+                                          child_key, cur.copy()))
+            for record in reversed(step):
+                state.unmove(cur, record)
+    return Result(UNKNOWN if limited else UNSOLVABLE, None, nodes)
+
+
+def solve(tableau, foundation, cells, max_nodes=100000, time_limit=None,
+          max_states=1000000, weight=0):
+    '''
+        This function finds a list of moves that wins the game from the
+        (tableau, foundation, cells) tuple returned by initialize().
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        return: list of moves (option, s, d), or None if no win was found
+    '''
+    result = search(state.from_game(tableau, foundation, cells),
+                    max_nodes, time_limit, max_states, weight)
+    return result.moves
+
+
+def solve_rate(deals, **limits):
+    '''
+        This function deals games the way initialize() does, from the
+        module-level random generator so they follow random.seed, and
+        tries to solve each of them.
+
+        deals: int
+        return: tup (solved, unsolvable, unknown)
+    '''
+    counts = {SOLVED: 0, UNSOLVABLE: 0, UNKNOWN: 0}
+    for i in range(deals):
+        result = search(state.from_permutation(state.permutation()), **limits)
+        counts[result.status] += 1
+    return (counts[SOLVED], counts[UNSOLVABLE], counts[UNKNOWN])
+
+
+if __name__ == '__main__':
+    random.seed(100)  # the deals solitaire.py starts with
+    deals = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    start = time.monotonic()
+    solved, unsolvable, unknown = solve_rate(deals)
+    print("{} deals: {} solved, {} unsolvable, {} unknown ({:.1%}) in {:.1f}s".format(
+        deals, solved, unsolvable, unknown, solved / deals, time.monotonic() - start))
@@ -0,0 +1,653 @@
+# Solitaire: Seahaven - compact game state
+#
+# Every card is stored as a small int: rank * 4 + (suit - 1), so that the
+# ace of clubs is 4 and the king of spades is 55.  The value 0 marks an
+# empty cell or an empty foundation pile.  Two cards can be compared with
+# plain integer arithmetic:
+#     same suit      -> a & 3 == b & 3
+#     rank           -> a >> 2
+#     one rank above -> a + 4 (same suit)
+#
+# Every State also carries a Zobrist hash (see zobrist.py) that the move
+# functions keep up to date, and that ignores the order of the cells, the
+# foundation piles and the tableau columns.  It also counts the cards on
+# the foundation and the top rank of every suit there, so that win checks
+# and progress are O(1).
+
+
+import random
+
+import cards
+import zobrist
+from zobrist import STACK, CELL, FOUND, CODES
+
+EMPTY = 0
+ACE = 1
+KING = 13
+
+
+class State(object):
+    '''
+        Compact Seahaven position.
+
+        tableau: list of 10 bytearrays, the end of each one is the playable card
+        cells: bytearray of 4 card codes (0 when the cell is empty)
+        foundation: bytearray of 4 card codes, the top card of each pile
+        hash: int, Zobrist hash of the position
+        home: int, number of cards on the foundation
+        ranks: bytearray of 4 ranks, the top rank on the foundation of every
+            suit (suit - 1 is the index), 0 before its Ace goes up
+    '''
+    __slots__ = ('tableau', 'cells', 'foundation', 'hash', 'home', 'ranks')
+
+    def __init__(self, tableau=None, cells=None, foundation=None):
+        if tableau is None:
+            tableau = [bytearray() for i in range(10)]
+        self.tableau = tableau
+        self.cells = cells if cells is not None else bytearray(4)
+        self.foundation = foundation if foundation is not None else bytearray(4)
+        self.hash = zobrist.compute(self.tableau, self.cells, self.foundation)
+        self.ranks = bytearray(4)
+        for top in self.foundation:
+            if top != EMPTY:
+                self.ranks[top & 3] = top >> 2
+        self.home = sum(self.ranks)
+
+    def copy(self):
+        '''
+            return: State, independent of this one
+        '''
+        new = State.__new__(State)
+        new.tableau = [bytearray(col) for col in self.tableau]
+        new.cells = bytearray(self.cells)
+        new.foundation = bytearray(self.foundation)
+        new.hash = self.hash
+        new.home = self.home
+        new.ranks = bytearray(self.ranks)
+        return new
+
+
+def encode(card):
+    '''
+        This function converts a cards.Card into its card code.
+
+        card: Card or None
+        return: int
+    '''
+    if card is None:
+        return EMPTY
+    return card.code
+
+
+def decode(code):
+    '''
+        This function converts a card code back into a cards.Card.
+
+        code: int
+        return: Card or None
+    '''
+    if code == EMPTY:
+        return None
+    return cards.CARDS[code - 4]
+
+
+def from_game(tableau, foundation, cells):
+    '''
+        This function builds a compact State from the
+        (tableau, foundation, cells) tuple returned by initialize().
+
+        tableau: nested list
+        foundation: nested list
+        cells: list
+        return: State
+    '''
+    return State([bytearray(encode(card) for card in col) for col in tableau],
+                 bytearray(encode(card) for card in cells),
+                 bytearray(encode(pile[-1]) if pile else EMPTY for pile in foundation))
+
+
+def to_game(state):
+    '''
+        This function converts a compact State back into the
+        (tableau, foundation, cells) tuple used by solitaire.
+
+        state: State
+        return: tup (tableau, foundation, cells)
+    '''
+    tableau = [[decode(code) for code in col] for col in state.tableau]
+    cells = [decode(code) for code in state.cells]
+    foundation = []
+    for top in state.foundation:
+        # a pile always holds ace..top of a single suit
+        suit = top & 3
+        foundation.append([decode(rank * 4 + suit) for rank in range(ACE, (top >> 2) + 1)])
+    return (tableau, foundation, cells)
+
+
+def permutation(seed=None, rng=None):
+    '''
+        This function shuffles a deck the way cards.Deck does and returns
+        the dealing order as deck indices, where index i is the card of
+        rank i // 4 + 1 and suit i % 4 + 1.
+
+        seed: int or None, seed for a private random.Random
+        rng: random.Random or None, used instead of seed when given
+        return: bytes, 52 distinct indices
+    '''
+    if rng is None:
+        rng = random if seed is None else random.Random(seed)
+    order = list(range(52))
+    rng.shuffle(order)
+    return bytes(order)
+
+
+def check_permutation(perm):
+    '''
+        This function makes sure perm holds each deck index once.
+
+        perm: bytes
+    '''
+    if len(perm) != 52 or len(set(perm)) != 52 or max(perm) > 51:
+        raise ValueError("not a permutation of 52 cards")
+
+
+def from_permutation(perm):
+    '''
+        This function deals a compact State straight from a permutation,
+        the same way initialize() deals cards: card i of the order goes to
+        column i % 10 for the first 50 cards and the last two go to the
+        middle cells.
+
+        perm: bytes
+        return: State
+    '''
+    check_permutation(perm)
+    codes = bytes(i + 4 for i in perm)  # deck index -> card code
+    return State([bytearray(codes[col:50:10]) for col in range(10)],
+                 bytearray((EMPTY, codes[50], codes[51], EMPTY)))
+
+
+def can_stack(src, dst):
+    '''
+        This function checks if card src may be put on card dst in the
+        tableau; dst is EMPTY for an empty column, which only takes a King.
+
+        src: int
+        dst: int
+        return: bool
+    '''
+    if dst == EMPTY:
+        return src >> 2 == KING
+    return src + 4 == dst
+
+
+def can_found(src, top):
+    '''
+        This function checks if card src may be put on a foundation
+        pile whose top card is top (EMPTY for an empty pile).
+
+        src: int
+        top: int
+        return: bool
+    '''
+    if top == EMPTY:
+        return src >> 2 == ACE
+    return src == top + 4
+
+
+# can_stack and can_found for every pair of codes, looked up at
+# src * CODES + dst (or top), so that checking a move is a single index
+CAN_STACK = tuple(can_stack(src, dst) for src in range(CODES) for dst in range(CODES))
+CAN_FOUND = tuple(can_found(src, top) for src in range(CODES) for top in range(CODES))
+
+
+def validate_move_within_tableau(state, src_col, dst_col):
+    '''
+        This function checks to see if a card can be moved
+        from the end of a specified column into the end of another
+        specified column within the tableau.
+
+        state: State
+        src_col: int
+        dst_col: int
+        return: bool
+    '''
+    src = state.tableau[src_col]
+    if not src:
+        return False
+    dst = state.tableau[dst_col]
+    return CAN_STACK[src[-1] * CODES + (dst[-1] if dst else EMPTY)]
+
+
+def validate_move_cell_to_tableau(state, cell_no, dst_col):
+    '''
+        This function checks to see if a specified card from the cell
+        can be moved to the end of a specified column in the tableau.
+
+        state: State
+        cell_no: int
+        dst_col: int
+        return: bool
+    '''
+    card = state.cells[cell_no]
+    if card == EMPTY:
+        return False
+    dst = state.tableau[dst_col]
+    return CAN_STACK[card * CODES + (dst[-1] if dst else EMPTY)]
+
+
+def validate_move_tableau_to_cell(state, src_col, cell_no):
+    '''
+        This function checks to see if a card from the end of a
+        specified column in the tableau can be moved into the cell.
+
+        state: State
+        src_col: int
+        cell_no: int
+        return: bool
+    '''
+    return bool(state.tableau[src_col]) and state.cells[cell_no] == EMPTY
+
+
+def validate_move_tableau_to_foundation(state, src_col, found_no):
+    '''
+        This function checks to see if a card from the end of a
+        specified column in the tableau can be moved into a specified
+        pile within the foundation.
+
+        state: State
+        src_col: int
+        found_no: int
+        return: bool
+    '''
+    src = state.tableau[src_col]
+    if not src:
+        return False
+    return CAN_FOUND[src[-1] * CODES + state.foundation[found_no]]
+
+
+def validate_move_cell_to_foundation(state, cell_no, found_no):
+    '''
+        This function checks to see if a card from the cell can
+        be moved into a specified pile within the foundation.
+
+        state: State
+        cell_no: int
+        found_no: int
+        return: bool
+    '''
+    card = state.cells[cell_no]
+    if card == EMPTY:
+        return False
+    return CAN_FOUND[card * CODES + state.foundation[found_no]]
+
+
+def move_within_tableau(state, src_col, dst_col):
+    '''
+        This function moves the card at the end of column src_col
+        to the end of column dst_col if the move is legal.
+
+        state: State
+        src_col: int
+        dst_col: int
+        return: tup (option, s, d), the move record for unmove(), or False
+    '''
+    if not validate_move_within_tableau(state, src_col, dst_col):
+        return False
+    return do_move_within_tableau(state, src_col, dst_col)
+
+
+def do_move_within_tableau(state, src_col, dst_col):
+    '''
+        This function moves the card at the end of column src_col to the
+        end of column dst_col without checking that the move is legal.
+
+        state: State
+        src_col: int
+        dst_col: int
+        return: tup (option, s, d), the move record for unmove()
+    '''
+    src = state.tableau[src_col]
+    dst = state.tableau[dst_col]
+    card = src.pop()
+    state.hash ^= STACK[card * CODES + (src[-1] if src else EMPTY)] \
+        ^ STACK[card * CODES + (dst[-1] if dst else EMPTY)]
+    dst.append(card)
+    return ('MTT', src_col + 1, dst_col + 1)
+
+
+def move_tableau_to_cell(state, src_col, cell_no):
+    '''
+        This function moves the card at the end of column src_col
+        into cell cell_no if the move is legal.
+
+        state: State
+        src_col: int
+        cell_no: int
+        return: tup (option, s, d), the move record for unmove(), or False
+    '''
+    if not validate_move_tableau_to_cell(state, src_col, cell_no):
+        return False
+    return do_move_tableau_to_cell(state, src_col, cell_no)
+
+
+def do_move_tableau_to_cell(state, src_col, cell_no):
+    '''
+        This function moves the card at the end of column src_col into
+        cell cell_no without checking that the move is legal.
+
+        state: State
+        src_col: int
+        cell_no: int
+        return: tup (option, s, d), the move record for unmove()
+    '''
+    src = state.tableau[src_col]
+    card = src.pop()
+    state.hash ^= STACK[card * CODES + (src[-1] if src else EMPTY)] ^ CELL[card]
+    state.cells[cell_no] = card
+    return ('MTC', src_col + 1, cell_no + 1)
+
+
+def move_cell_to_tableau(state, cell_no, dst_col):
+    '''
+        This function moves the card in cell cell_no to the
+        end of column dst_col if the move is legal.
+
+        state: State
+        cell_no: int
+        dst_col: int
+        return: tup (option, s, d), the move record for unmove(), or False
+    '''
+    if not validate_move_cell_to_tableau(state, cell_no, dst_col):
+        return False
+    return do_move_cell_to_tableau(state, cell_no, dst_col)
+
+
+def do_move_cell_to_tableau(state, cell_no, dst_col):
+    '''
+        This function moves the card in cell cell_no to the end of
+        column dst_col without checking that the move is legal.
+
+        state: State
+        cell_no: int
+        dst_col: int
+        return: tup (option, s, d), the move record for unmove()
+    '''
+    dst = state.tableau[dst_col]
+    card = state.cells[cell_no]
+    state.hash ^= CELL[card] ^ STACK[card * CODES + (dst[-1] if dst else EMPTY)]
+    dst.append(card)
+    state.cells[cell_no] = EMPTY
+    return ('MCT', cell_no + 1, dst_col + 1)
+
+
+def move_cell_to_foundation(state, cell_no, found_no):
+    '''
+        This function moves the card in cell cell_no onto
+        foundation pile found_no if the move is legal.
+
+        state: State
+        cell_no: int
+        found_no: int
+        return: tup (option, s, d), the move record for unmove(), or False
+    '''
+    if not validate_move_cell_to_foundation(state, cell_no, found_no):
+        return False
+    return do_move_cell_to_foundation(state, cell_no, found_no)
+
+
+def do_move_cell_to_foundation(state, cell_no, found_no):
+    '''
+        This function moves the card in cell cell_no onto foundation
+        pile found_no without checking that the move is legal.
+
+        state: State
+        cell_no: int
+        found_no: int
+        return: tup (option, s, d), the move record for unmove()
+    '''
+    card = state.cells[cell_no]
+    state.hash ^= CELL[card] ^ FOUND[state.foundation[found_no]] ^ FOUND[card]
+    state.foundation[found_no] = card
+    state.cells[cell_no] = EMPTY
+    state.home += 1
+    state.ranks[card & 3] += 1
+    return ('MCF', cell_no + 1, found_no + 1)
+
+
+def move_tableau_to_foundation(state, src_col, found_no):
+    '''
+        This function moves the card at the end of column src_col
+        onto foundation pile found_no if the move is legal.
+
+        state: State
+        src_col: int
+        found_no: int
+        return: tup (option, s, d), the move record for unmove(), or False
+    '''
+    if not validate_move_tableau_to_foundation(state, src_col, found_no):
+        return False
+    return do_move_tableau_to_foundation(state, src_col, found_no)
+
+
+def do_move_tableau_to_foundation(state, src_col, found_no):
+    '''
+        This function moves the card at the end of column src_col onto
+        foundation pile found_no without checking that the move is
+        legal.
+
+        state: State
+        src_col: int
+        found_no: int
+        return: tup (option, s, d), the move record for unmove()
+    '''
+    src = state.tableau[src_col]
+    card = src.pop()
+    state.hash ^= STACK[card * CODES + (src[-1] if src else EMPTY)] \
+        ^ FOUND[state.foundation[found_no]] ^ FOUND[card]
+    state.foundation[found_no] = card
+    state.home += 1
+    state.ranks[card & 3] += 1
+    return ('MTF', src_col + 1, found_no + 1)
+
+
+def cascade(state, record=None):
+    '''
+        This function sends home every card that can go to the foundation
+        from the end of a column or from a cell, until none is left.
+        Cards are only ever built down in suit, so once the card below in
+        the same suit is home nothing else can use a card and these moves
+        are always safe. After a move, only the places the move touched
+        and the next card of a suit that went home are looked at, never
+        the whole board.
+
+        state: State
+        record: tup (option, s, d), the move just played, or None to look
+            at every column and cell
+        return: list of move records played
+    '''
+    if record is None:
+        places = [('T', col_no) for col_no in range(10)] + [('C', cell_no) for cell_no in range(4)]
+    else:
+        option, s, d = record
+        places = [(option[1], s - 1), (option[2], d - 1)]
+    played = []
+    while places:
+        kind, n = places.pop()
+        if kind == 'F':
+            # the next card of the suit may be waiting at a column end or in a cell
+            card = state.foundation[n] + 4
+            if card >> 2 > KING:
+                continue
+            n = state.cells.find(card)
+            if n >= 0:
+                kind = 'C'
+            else:
+                for n, col in enumerate(state.tableau):
+                    if col and col[-1] == card:
+                        kind = 'T'
+                        break
+                else:
+                    continue
+        if kind == 'T':
+            col = state.tableau[n]
+            if not col:
+                continue
+            card = col[-1]
+        else:
+            card = state.cells[n]
+            if card == EMPTY:
+                continue
+        found_no = state.foundation.find(card - 4 if card >> 2 != ACE else EMPTY)
+        if found_no < 0:
+            continue
+        if kind == 'T':
+            played.append(do_move_tableau_to_foundation(state, n, found_no))
+            places.append(('T', n))  # the card it uncovered
+        else:
+            played.append(do_move_cell_to_foundation(state, n, found_no))
+        places.append(('F', found_no))
+    return played
+
+
+def check_for_win(state):
+    '''
+        This function checks to see if all 52 cards are
+        in the foundation.
+
+        state: State
+        return: bool
+    '''
+    return state.home == 52
+
+
+def progress(state):
+    '''
+        This function tells how far the foundation has come.
+
+        state: State
+        return: tup (cards home, list of cards still to go for every suit)
+    '''
+    return (state.home, [KING - rank for rank in state.ranks])
+
+
+# validators, unchecked moves and moves by the option names used in the MENU
+VALIDATORS = {
+    'MTT': validate_move_within_tableau,
+    'MTC': validate_move_tableau_to_cell,
+    'MCT': validate_move_cell_to_tableau,
+    'MTF': validate_move_tableau_to_foundation,
+    'MCF': validate_move_cell_to_foundation,
+}
+
+DO_MOVES = {
+    'MTT': do_move_within_tableau,
+    'MTC': do_move_tableau_to_cell,
+    'MCT': do_move_cell_to_tableau,
+    'MTF': do_move_tableau_to_foundation,
+    'MCF': do_move_cell_to_foundation,
+}
+
+MOVES = {
+    'MTT': move_within_tableau,
+    'MTC': move_tableau_to_cell,
+    'MCT': move_cell_to_tableau,
+    'MTF': move_tableau_to_foundation,
+    'MCF': move_cell_to_foundation,
+}
+
+
+def apply(state, move):
+    '''
+        This function plays a move given the way get_option returns it,
+        with 1-based source and destination numbers.
+
+        state: State
+        move: tup (option, s, d)
+        return: tup, the move record, or False
+    '''
+    option, s, d = move
+    return MOVES[option](state, s - 1, d - 1)
+
+
+def unmove(state, record):
+    '''
+        This function takes back the move a move_* function made, given
+        the record it returned. Moves must be taken back in the reverse
+        order they were played; the position, hash included, is then
+        exactly the one before the move.
+
+        state: State
+        record: tup (option, s, d)
+    '''
+    option, s, d = record
+    s -= 1
+    d -= 1
+    tableau = state.tableau
+    if option == 'MTT':
+        src = tableau[s]
+        dst = tableau[d]
+        card = dst.pop()
+        state.hash ^= STACK[card * CODES + (dst[-1] if dst else EMPTY)] \
+            ^ STACK[card * CODES + (src[-1] if src else EMPTY)]
+        src.append(card)
+    elif option == 'MTC':
+        src = tableau[s]
+        card = state.cells[d]
+        state.hash ^= CELL[card] ^ STACK[card * CODES + (src[-1] if src else EMPTY)]
+        state.cells[d] = EMPTY
+        src.append(card)
+    elif option == 'MCT':
+        dst = tableau[d]
+        card = dst.pop()
+        state.hash ^= STACK[card * CODES + (dst[-1] if dst else EMPTY)] ^ CELL[card]
+        state.cells[s] = card
+    else:
+        card = state.foundation[d]
+        below = card - 4 if card >> 2 != ACE else EMPTY
+        state.hash ^= FOUND[card] ^ FOUND[below]
+        state.foundation[d] = below
+        state.home -= 1
+        state.ranks[card & 3] -= 1
+        if option == 'MTF':
+            src = tableau[s]
+            state.hash ^= STACK[card * CODES + (src[-1] if src else EMPTY)]
+            src.append(card)
+        else:
+            state.hash ^= CELL[card]
+            state.cells[s] = card
+
+
+def reject_reason(state, option, src, dst):
+    '''
+        This function explains why a move is illegal.
+
+        state: State
+        option: str, such as 'MTT'
+        src: int, 0-based source
+        dst: int, 0-based destination
+        return: str, or None if the move is legal
+    '''
+    if VALIDATORS[option](state, src, dst):
+        return None
+    if option[1] == 'T':
+        col = state.tableau[src]
+        card = col[-1] if col else EMPTY
+    else:
+        card = state.cells[src]
+    if card == EMPTY:
+        return "empty source"
+    if option[2] == 'C':
+        return "occupied cell"
+    if option[2] == 'T':
+        col = state.tableau[dst]
+        if not col:
+            return "non-King to empty column"
+        target = col[-1]
+    else:
+        target = state.foundation[dst]
+        if target == EMPTY:
+            return "non-Ace to empty foundation"
+    if target & 3 != card & 3:
+        return "suit mismatch"
+    return "rank mismatch"
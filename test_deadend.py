@@ -0,0 +1,72 @@
+# Solitaire: Seahaven - dead-end detection tests
+#
+# The solver and the simulator never expand a position deadend.check()
+# finds lost, so a wrong verdict would silently drop winnable deals.
+# Every position it flags on seeded random games must be proven lost by a
+# full search with that pruning turned off.
+
+
+import random
+
+import deadend
+import movegen
+import solver
+import state
+
+SEEDS = range(300)
+
+
+def flagged_positions(seeds, plies=150):
+    '''
+        This function plays random legal moves from every seed and yields
+        the first position of each game that deadend.check() flags.
+
+        return: generator of tup (seed, State, Reason)
+    '''
+    for seed in seeds:
+        rng = random.Random(seed)
+        st = state.from_permutation(state.permutation(seed))
+        for ply in range(plies):
+            moves = sorted(movegen.legal_moves(st))
+            if not moves:
+                break
+            state.apply(st, rng.choice(moves))
+            reason = deadend.check(st)
+            if reason is not None:
+                yield seed, st, reason
+                break
+
+
+def test_flagged_positions_are_lost():
+    flagged = 0
+    for seed, st, reason in flagged_positions(SEEDS):
+        flagged += 1
+        result = solver.search(st, max_nodes=1000000, prune=False)
+        assert result.status == solver.UNSOLVABLE, \
+            "seed {}: {} but {}".format(seed, reason.rule, result.status)
+    assert flagged > len(SEEDS) // 2  # the check must find some to be worth anything
+
+
+def test_reason_names_the_cells():
+    for seed, st, reason in flagged_positions(range(20)):
+        assert reason.rule in ('no-moves', 'cells-deadlock')
+        assert reason.cards == tuple(st.cells)
+        assert state.EMPTY not in reason.cards
+
+
+def test_free_cell_is_never_lost():
+    st = state.from_permutation(state.permutation(0))
+    assert state.EMPTY in st.cells
+    assert deadend.check(st) is None
+
+
+def test_winning_lines_are_never_flagged():
+    for seed in range(10):
+        st = state.from_permutation(state.permutation(seed))
+        result = solver.search(st, max_nodes=20000, prune=False)
+        if result.status != solver.SOLVED:
+            continue
+        for move in result.moves:
+            assert state.apply(st, move)
+            assert deadend.check(st) is None, "seed {} after {}".format(seed, move)
+        assert state.check_for_win(st)
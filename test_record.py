@@ -0,0 +1,103 @@
+# Solitaire: Seahaven - game record tests
+
+
+import random
+
+import pytest
+
+import engine
+import movegen
+import record
+import state
+
+
+def played_games(count, autoplay=False):
+    '''
+        This function plays seeded random games, with some undos.
+
+        return: list of GameSession
+    '''
+    games = []
+    for seed in range(count):
+        rng = random.Random(seed)
+        game = engine.GameSession(seed=seed, autoplay=autoplay)
+        for ply in range(rng.randrange(60)):
+            moves = sorted(movegen.legal_moves(game.state))
+            if not moves:
+                break
+            if rng.random() < 0.1:
+                game.undo()
+            else:
+                game.play(rng.choice(moves))
+        games.append(game)
+    return games
+
+
+def write(path, games):
+    with record.RecordWriter(str(path)) as writer:
+        for game in games:
+            writer.write_game(game)
+
+
+def test_move_codes_round_trip():
+    assert len(record.MOVE_CODES) == 226
+    assert record.decode_moves(record.encode_moves(record.MOVE_CODES)) == record.MOVE_CODES
+
+
+@pytest.mark.parametrize('autoplay', [False, True])
+def test_games_round_trip(tmp_path, autoplay):
+    games = played_games(30, autoplay)
+    write(tmp_path / 'games.shg', games)
+    with record.RecordReader(str(tmp_path / 'games.shg')) as reader:
+        assert len(reader) == len(games)
+        assert reader.index is not None
+        for n, (game, (deal, moves)) in enumerate(zip(games, reader)):
+            assert bytes(deal) == game.perm
+            assert record.decode_moves(moves) == [tuple(move) for move in game.moves()]
+            assert reader[n] == (deal, moves)
+            tableau, foundation, cells = record.replay(bytes(deal), bytes(moves))
+            assert state.from_game(tableau, foundation, cells).hash == game.state.hash
+        assert reader[-1] == reader[len(games) - 1]
+        with pytest.raises(IndexError):
+            reader[len(games)]
+
+
+def test_file_without_index(tmp_path):
+    games = played_games(5)
+    write(tmp_path / 'games.shg', games)
+    data = (tmp_path / 'games.shg').read_bytes()
+    (tmp_path / 'cut.shg').write_bytes(data[:-(len(games) * 8 + 12)])
+    with record.RecordReader(str(tmp_path / 'cut.shg')) as reader:
+        assert reader.index is None
+        assert len(reader) == len(games)
+        with pytest.raises(IndexError):
+            reader[0]
+
+
+def test_moves_ending_like_an_index(tmp_path):
+    # the bytes of INDEX_MAGIC are move codes too
+    perm = state.permutation(1)
+    moves = [record.MOVE_CODES[code] for code in record.INDEX_MAGIC] * 3
+    with record.RecordWriter(str(tmp_path / 'games.shg')) as writer:
+        writer.write(perm, moves)
+    data = (tmp_path / 'games.shg').read_bytes()
+    (tmp_path / 'cut.shg').write_bytes(data[:-20])
+    with record.RecordReader(str(tmp_path / 'cut.shg')) as reader:
+        assert reader.index is None
+        assert [(bytes(deal), record.decode_moves(data)) for deal, data in reader] == \
+            [(perm, moves)]
+
+
+def test_last_game_cut_short(tmp_path):
+    games = played_games(4)
+    write(tmp_path / 'games.shg', games)
+    data = (tmp_path / 'games.shg').read_bytes()
+    (tmp_path / 'cut.shg').write_bytes(data[:-(len(games) * 8 + 12) - 1])
+    with record.RecordReader(str(tmp_path / 'cut.shg')) as reader:
+        assert [bytes(deal) for deal, moves in reader] == [game.perm for game in games[:-1]]
+
+
+def test_not_a_record_file(tmp_path):
+    (tmp_path / 'other').write_bytes(b'not a record')
+    with pytest.raises(ValueError):
+        record.RecordReader(str(tmp_path / 'other'))
@@ -0,0 +1,89 @@
+# Solitaire: Seahaven - replay verifier tests
+
+
+import io, json, random
+
+import engine
+import movegen
+import record
+import solver
+import state
+import verify
+
+
+def solved(seeds):
+    '''
+        return: list of tup (seed, moves) for the seeds the solver wins
+    '''
+    games = []
+    for seed in seeds:
+        result = solver.search(state.from_permutation(state.permutation(seed)), max_nodes=20000)
+        if result.status == solver.SOLVED:
+            games.append((seed, result.moves))
+    return games
+
+
+def test_won_games_verify():
+    games = solved(range(5))
+    assert games
+    for seed, moves in games:
+        assert verify.verify(seed, moves) == verify.Verdict(True, True, None, None)
+        assert verify.verify(state.permutation(seed), record.encode_moves(moves)).won
+        assert verify.verify(seed, ['{} {} {}'.format(*move) for move in moves]).won
+
+
+def test_first_illegal_move_is_reported():
+    seed, moves = solved(range(5))[0]
+    moves = list(moves)
+    moves.insert(3, moves[2])  # the same card cannot move twice from the same place
+    verdict = verify.verify(seed, moves)
+    assert not verdict.valid and verdict.illegal == 4
+    assert verdict.error.startswith("illegal move")
+
+
+def test_autoplay_games_verify():
+    for seed in range(20):
+        rng = random.Random(seed)
+        game = engine.GameSession(seed=seed, autoplay=True)
+        for ply in range(40):
+            moves = sorted(movegen.legal_moves(game.state))
+            if not moves:
+                break
+            game.play(rng.choice(moves))
+        assert verify.verify(game.perm, game.moves()).valid
+
+
+def test_malformed_submissions_get_verdicts():
+    lines = [json.dumps({'seed': 3, 'moves': [['MTT', '3', '5']]}),
+             json.dumps({'deal': 'zz', 'moves': []}),
+             json.dumps({'moves': []}),
+             'not json',
+             json.dumps({'seed': 3, 'moves': 5}),
+             json.dumps({'seed': 3, 'moves': [[['MTT'], 1, 2]]}),
+             '',
+             json.dumps({'seed': 3, 'moves': []})]
+    verdicts = list(verify.run(verify.read_json_lines(io.StringIO('\n'.join(lines))), workers=1))
+    assert [verdict.error for verdict in verdicts] == \
+        ['bad move', 'bad deal', 'bad deal', 'bad deal', 'bad move', 'bad move', None]
+    assert verdicts[-1].valid
+
+
+def test_pool_keeps_the_order():
+    submissions = [(seed, ['MTC 1 1', 'MTC {} 4'.format(seed % 10 + 1), 'MTF 1 1'])
+                   for seed in range(600)]
+    alone = list(verify.run(submissions, workers=1, chunk=37))
+    assert list(verify.run(iter(submissions), workers=2, chunk=37)) == alone
+    assert len(alone) == len(submissions)
+    assert 0 < sum(verdict.valid for verdict in alone) < len(alone)
+
+
+def test_record_file_round_trip(tmp_path):
+    games = solved(range(5))
+    path = str(tmp_path / 'games.shg')
+    with record.RecordWriter(path) as writer:
+        for seed, moves in games:
+            writer.write(state.permutation(seed), moves)
+        writer.write(state.permutation(99), [('MCF', 1, 1)])
+    verdicts = list(verify.run(verify.read_submissions(path), workers=1))
+    assert [verdict.won for verdict in verdicts[:-1]] == [True] * len(games)
+    assert not verdicts[-1].valid and verdicts[-1].illegal == 1
@@ -0,0 +1,187 @@
+# Solitaire: Seahaven - replay verifier
+#
+# Checks that submitted games follow the rules: every deal is rebuilt the
+# way initialize() deals it and every move is replayed through the same
+# checks as the validate_move_* functions, stopping at the first illegal
+# one.  Submissions are read as a stream and checked in chunks by a pool
+# of processes, in the order they came, with at most two chunks a worker
+# read ahead, so memory does not grow with the size of the input:
+#     python verify.py games.shg --workers 8      a record file (record.py)
+#     python verify.py games.jsonl                one JSON object a line,
+#         {"seed": 17, "moves": ["MTT 3 5", ...]} or {"deal": "<52 bytes in hex>", ...}
+
+
+import argparse, itertools, json, os, sys, time
+from collections import deque, namedtuple
+from multiprocessing import Pool
+
+import engine
+import record
+import state
+
+# valid: bool, every move was legal
+# won: bool, check_for_win after the last legal move
+# illegal: int, number of the first illegal move counted from 1, or None
+# error: str, why the game is not valid, or None
+Verdict = namedtuple('Verdict', 'valid won illegal error')
+
+
+def verify(deal, moves):
+    '''
+        This function replays one submitted game.
+
+        deal: int seed for initialize(), or bytes permutation (see
+            state.permutation)
+        moves: list of moves (option, s, d) or str such as 'MTT 3 5', or
+            bytes of record.MOVE_CODES
+        return: Verdict
+    '''
+    try:
+        st = state.from_permutation(state.permutation(deal) if isinstance(deal, int) else deal)
+    except (ValueError, TypeError):
+        return Verdict(False, False, None, "bad deal")
+    coded = isinstance(moves, (bytes, bytearray))
+    number = 0
+    try:
+        for number, move in enumerate(moves):
+            if coded:
+                move = record.MOVE_CODES[move] if move < len(record.MOVE_CODES) else None
+            elif isinstance(move, str):
+                move = engine.parse_option(move)
+            if not move or len(move) != 3 or move[0] not in state.MOVES \
+                    or type(move[1]) != int or type(move[2]) != int:
+                return Verdict(False, state.check_for_win(st), number + 1, "bad move")
+            option, s, d = move
+            if not (1 <= s <= engine.PLACES[option[1]] and 1 <= d <= engine.PLACES[option[2]]) \
+                    or not state.MOVES[option](st, s - 1, d - 1):
+                return Verdict(False, state.check_for_win(st), number + 1,
+                               "illegal move {} {} {}".format(option, s, d))
+    except (TypeError, ValueError, KeyError, IndexError):
+        # moves is not a list of moves at all, or a move is not something
+        # the checks above can even look at, such as an unhashable option
+        return Verdict(False, state.check_for_win(st), number + 1, "bad move")
+    return Verdict(True, state.check_for_win(st), None, None)
+
+
+def verify_chunk(chunk):
+    '''
+        This function verifies a chunk of submissions, in a worker process.
+
+        chunk: list of tup (deal, moves)
+        return: list of Verdict
+    '''
+    return [verify(deal, moves) for deal, moves in chunk]
+
+
+def chunked(submissions, size):
+    '''
+        This function cuts a stream of submissions into lists of size,
+        reading the stream only as each chunk is asked for.
+    '''
+    submissions = iter(submissions)
+    while True:
+        chunk = list(itertools.islice(submissions, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(submissions, workers=None, chunk=1000):
+    '''
+        This function verifies a stream of submissions.
+
+        submissions: iterable of tup (deal, moves)
+        workers: int, processes to use (all cores when None)
+        chunk: int, submissions sent to a worker at a time
+        return: generator of Verdict, in the order of submissions
+    '''
+    if workers == 1:
+        for part in chunked(submissions, chunk):
+            yield from verify_chunk(part)
+        return
+    workers = workers or os.cpu_count() or 1
+    # Pool.imap would read the whole stream ahead on its own thread, so
+    # chunks are handed out one at a time with a cap on those in flight
+    pending = deque()
+    with Pool(workers) as pool:
+        for part in chunked(submissions, chunk):
+            pending.append(pool.apply_async(verify_chunk, (part,)))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def read_json_lines(f):
+    '''
+        This function reads submissions written one JSON object a line.
+        A line that is not a submission is passed on with an empty deal,
+        so that it gets a bad deal verdict and the stream goes on.
+
+        f: text file
+        return: generator of tup (deal, moves)
+    '''
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            submission = json.loads(line)
+            if 'seed' in submission:
+                deal = submission['seed']
+            else:
+                deal = bytes.fromhex(submission['deal'])
+            moves = submission['moves']
+        except (ValueError, KeyError, TypeError):
+            # not JSON, or not a submission: verify() finds no deal in it
+            deal, moves = b'', ()
+        yield (deal, moves)
+
+
+def read_submissions(path):
+    '''
+        This function reads a record file or a JSON lines file.
+
+        path: str
+        return: generator of tup (deal, moves)
+    '''
+    with open(path, 'rb') as f:
+        is_record = f.read(len(record.MAGIC)) == record.MAGIC
+    if is_record:
+        with record.RecordReader(path) as reader:
+            for deal, moves in reader:
+                yield (bytes(deal), bytes(moves))
+    else:
+        with open(path) as f:
+            yield from read_json_lines(f)
+
+
+def main(argv=None):
+    ''' verifier command line '''
+    parser = argparse.ArgumentParser(description='Verify submitted Seahaven games.')
+    parser.add_argument('path', help='record file or JSON lines file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk', type=int, default=1000, help='games per worker task')
+    parser.add_argument('--show', type=int, default=10, help='invalid games to list')
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+    games = valid = won = 0
+    for number, verdict in enumerate(run(read_submissions(args.path), args.workers, args.chunk)):
+        games += 1
+        if verdict.valid:
+            valid += 1
+            won += verdict.won
+        elif games - valid <= args.show:
+            where = "move {}: ".format(verdict.illegal) if verdict.illegal else ""
+            print("game {}: {}{}".format(number + 1, where, verdict.error))
+    elapsed = time.monotonic() - start
+
+    print("games:      {}".format(games))
+    print("valid:      {} ({} won)".format(valid, won))
+    print("invalid:    {}".format(games - valid))
+    print("games/min:  {:.0f}".format(games / elapsed * 60 if elapsed else 0))
+    return 0 if valid == games else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
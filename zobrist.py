@@ -0,0 +1,52 @@
+# Solitaire: Seahaven - Zobrist keys
+#
+# A position hashes to the XOR of one random 64-bit key per card placement.
+# The placements are chosen so that the order of the cells, of the
+# foundation piles and of the tableau columns never enters the hash:
+#     STACK[card * 56 + below]  card in a column, on top of card below
+#                               (0 when it is the first card of the column)
+#     CELL[card]                card in any cell
+#     FOUND[top]                any foundation pile topped by card top
+# A set of columns is fully described by which card sits on which, so two
+# positions that only differ by the order of their columns get the same hash.
+# Every move changes two or three placements, which keeps updates O(1).
+
+
+import random
+
+CODES = 56  # card codes are 4..55, 0 is empty
+
+_rng = random.Random(0x5EA4A7E)  # private, leaves the game's random alone
+
+
+def _keys(count):
+    return [_rng.getrandbits(64) for i in range(count)]
+
+
+STACK = _keys(CODES * CODES)
+CELL = _keys(CODES)
+FOUND = _keys(CODES)
+CELL[0] = 0   # empty cells
+FOUND[0] = 0  # empty piles
+
+
+def compute(tableau, cells, foundation):
+    '''
+        This function computes the hash of a position from scratch.
+
+        tableau: list of 10 columns of card codes
+        cells: card codes
+        foundation: card codes of the pile tops
+        return: int
+    '''
+    h = 0
+    for col in tableau:
+        below = 0
+        for card in col:
+            h ^= STACK[card * CODES + below]
+            below = card
+    for card in cells:
+        h ^= CELL[card]
+    for top in foundation:
+        h ^= FOUND[top]
+    return h